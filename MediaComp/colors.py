@@ -215,11 +215,20 @@ class BaseRGB:
         """
         clamps int-like value to a 0-255 int value
 
+        Values that can not be converted to `int` but have a ``to_uint8()``
+        method of their own (the symbolic values used by
+        :py:meth:`.pictures.Picture.map` to trace transforms) clamp themselves.
+
         :param int value:
         :return: value converted to 0-255 range by camping
         :rtype int:
         """
-        return min(255, max(0, int(value)))
+        try:
+            return min(255, max(0, int(value)))
+        except TypeError:
+            if not hasattr(value, "to_uint8"):
+                raise
+            return value.to_uint8()
 
     @staticmethod
     def clamp(rgb: RGB) -> RGB:
@@ -230,9 +239,12 @@ class BaseRGB:
                     not be outside the 0-255 range
 
         """
-        return min(255, max(0, int(rgb[0]))),\
-            min(255, max(0, int(rgb[1]))),\
-            min(255, max(0, int(rgb[2])))
+        try:
+            return min(255, max(0, int(rgb[0]))),\
+                min(255, max(0, int(rgb[1]))),\
+                min(255, max(0, int(rgb[2])))
+        except TypeError:
+            return BaseRGB.to_uint8(rgb[0]), BaseRGB.to_uint8(rgb[1]), BaseRGB.to_uint8(rgb[2])
 
     @property
     def red(self) -> int:
@@ -240,7 +252,7 @@ class BaseRGB:
         The 0-255 `int` value representing the red component of the
         underlying `Tuple`
         """
-        return int(self.rgb[0])
+        return self.rgb[0]
 
     @property
     def green(self) -> int:
@@ -248,7 +260,7 @@ class BaseRGB:
         The 0-255 `int` value representing the green component of the
         underlying `Tuple`
         """
-        return int(self.rgb[1])
+        return self.rgb[1]
 
     @property
     def blue(self) -> int:
@@ -256,7 +268,7 @@ class BaseRGB:
         The 0-255 :py:type:int value representing the blue component of the
         underlying `Tuple`
         """
-        return int(self.rgb[2])
+        return self.rgb[2]
 
     @property
     def rgb(self) -> RGB:
@@ -264,7 +276,15 @@ class BaseRGB:
         An unpacked version of the underlying `Tuple`
         """
         _rgb = self.__rgb
-        return int(_rgb[0]), int(_rgb[1]), int(_rgb[2])
+        try:
+            return int(_rgb[0]), int(_rgb[1]), int(_rgb[2])
+        except TypeError:
+            # symbolic components recorded while tracing a transform, which have
+            # a to_uint8() method like in BaseRGB.to_uint8, are kept as they are
+            if not any(hasattr(value, "to_uint8") for value in _rgb):
+                raise
+            return tuple(value if hasattr(value, "to_uint8") else int(value)  # type: ignore
+                         for value in _rgb)
 
     def __repr__(self) -> str:
         return f"BaseRGB(({self.red},{self.green},{self.blue}))"
@@ -284,13 +304,19 @@ class BaseRGB:
             message_prefix = "BaseRGB.distance(): "
             message_middle = "expected color to be a BaseRGB object, actually "
             raise TypeError(message_prefix + message_middle + f"{type(color)}")
-        red_diff = float(self.red) - float(color.red)
-        green_diff = float(self.green) - float(color.green)
-        blue_diff = float(self.blue) - float(color.blue)
+        red_diff = self.red - color.red
+        green_diff = self.green - color.green
+        blue_diff = self.blue - color.blue
         sum_squares = red_diff * red_diff + \
             green_diff * green_diff + \
             blue_diff * blue_diff
-        return math.sqrt(sum_squares)
+        try:
+            return math.sqrt(sum_squares)
+        except TypeError:
+            if not hasattr(sum_squares, "sqrt"):
+                raise
+            # symbolic value recorded while tracing a transform
+            return sum_squares.sqrt()
 
 
 class Color(BaseRGB):
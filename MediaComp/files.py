@@ -24,6 +24,20 @@ import typing
 
 import pathlib
 
+# module collections is standard in Python 3: https://docs.python.org/3/library/collections.html
+# using collections.OrderedDict as the LRU list of the decode cache
+import collections
+
+# module threading is standard in Python 3: https://docs.python.org/3/library/threading.html
+# the decode cache may be used from several threads at once
+import threading
+
+# modules asyncio, concurrent.futures and functools are standard in Python 3
+# used to run decoding and encoding for coroutines on a thread pool in run_in_io_pool
+import asyncio
+import concurrent.futures
+import functools
+
 __PATH: pathlib.Path = pathlib.Path.cwd()  # pylint: invalid-name
 
 # TODO: use an ipyfilechooser (https://pypi.org/project/ipyfilechooser/)
@@ -65,3 +79,180 @@ def set_media_path(filename: typing.Optional[str] = None) -> bool:
         __PATH = new_path
         return True
     return False
+
+
+##############################################################################
+#
+# Decode cache
+#
+# Picture.from_file and Sound.from_file keep what they decode here, so reading
+# the same unchanged file again costs a lookup instead of a decode. Entries are
+# found by kind, resolved path and decoding options, and are only used if the
+# file's modification time and size are unchanged. When the entries take more
+# than the byte budget, the least recently used ones are dropped.
+#
+##############################################################################
+
+
+class CacheInfo(typing.NamedTuple):
+    """
+    statistics about the decode cache returned by :py:func:`cache_info`
+    """
+    hits: int
+    misses: int
+    entries: int
+    bytes: int
+    max_bytes: int
+
+
+T = typing.TypeVar("T")  # pylint: disable=invalid-name
+
+# key: (kind, resolved path, options), value: ((mtime_ns, size), decoded value, bytes used)
+__CACHE: 'collections.OrderedDict[typing.Tuple, typing.Any]' = collections.OrderedDict()
+__CACHE_LOCK = threading.Lock()
+__CACHE_STATS: typing.Dict[str, int] = {"hits": 0, "misses": 0, "bytes": 0, "max_bytes": 256 << 20}
+
+
+def load_cached(kind: str, filename: typing.Union[str, pathlib.Path],
+                loader: typing.Callable[[pathlib.Path], T], size_of: typing.Callable[[T], int],
+                *options: typing.Hashable) -> T:
+    """
+    Returns ``loader(path)``, or what an earlier call returned for the same
+    ``kind``, file and ``options`` if the file has not changed since.
+
+    The returned value is shared with every other caller, so callers must not
+    change it: Picture and Sound hand out copy-on-write copies of it.
+
+    :param str kind: what is being decoded, such as ``"picture"``
+    :param filename: name of the file, already passed through :py:func:`media_path`
+    :param loader: decodes the file
+    :param size_of: the number of bytes a decoded value takes
+    :param options: anything else that changes what ``loader`` returns
+    :return: the decoded value
+    """
+    path = pathlib.Path(filename).resolve()
+    status = path.stat()
+    signature = (status.st_mtime_ns, status.st_size)
+    key = (kind, str(path), options)
+    with __CACHE_LOCK:
+        entry = __CACHE.get(key)
+        if entry is not None and entry[0] == signature:
+            __CACHE.move_to_end(key)
+            __CACHE_STATS["hits"] += 1
+            return entry[1]
+        __CACHE_STATS["misses"] += 1
+    value = loader(path)
+    size = int(size_of(value))
+    with __CACHE_LOCK:
+        __drop(key)
+        if size <= __CACHE_STATS["max_bytes"]:
+            __CACHE[key] = (signature, value, size)
+            __CACHE_STATS["bytes"] += size
+            __evict()
+    return value
+
+
+def __drop(key: typing.Tuple) -> None:
+    entry = __CACHE.pop(key, None)
+    if entry is not None:
+        __CACHE_STATS["bytes"] -= entry[2]
+
+
+def __evict() -> None:
+    while __CACHE_STATS["bytes"] > __CACHE_STATS["max_bytes"]:
+        (_, (_, _, size)) = __CACHE.popitem(last=False)
+        __CACHE_STATS["bytes"] -= size
+
+
+def cache_info() -> CacheInfo:
+    """
+    Reports how well the decode cache used by ``Picture.from_file`` and
+    ``Sound.from_file`` is doing.
+
+    :return: hits, misses, entries, bytes used and the byte budget
+    :rtype: CacheInfo
+    """
+    with __CACHE_LOCK:
+        return CacheInfo(__CACHE_STATS["hits"], __CACHE_STATS["misses"], len(__CACHE),
+                         __CACHE_STATS["bytes"], __CACHE_STATS["max_bytes"])
+
+
+def cache_clear() -> None:
+    """
+    Empties the decode cache and resets its statistics
+    """
+    with __CACHE_LOCK:
+        __CACHE.clear()
+        __CACHE_STATS.update(hits=0, misses=0, bytes=0)
+
+
+def set_cache_size(max_bytes: int = 256 << 20) -> None:
+    """
+    Sets how many bytes of decoded media the decode cache may keep,
+    0 turns it off. The default is 256 MiB.
+
+    :param int max_bytes:
+    :raises ValueError: if ``max_bytes`` is negative
+    """
+    max_bytes = int(max_bytes)
+    if max_bytes < 0:
+        raise ValueError(f"In MediaComp.files.set_cache_size: max_bytes must not be negative, "
+                         f"actually {max_bytes}")
+    with __CACHE_LOCK:
+        __CACHE_STATS["max_bytes"] = max_bytes
+        __evict()
+
+
+##############################################################################
+#
+# Thread pool for asyncio
+#
+# The load_async and save_async coroutines of Picture and Sound hand the
+# blocking decode or encode to this pool, so the event loop keeps running.
+# The pool's size limits how many of them run at once, the rest wait in line.
+#
+##############################################################################
+
+__IO_POOL: typing.Optional[concurrent.futures.ThreadPoolExecutor] = None
+__IO_WORKERS: int = 8
+__IO_LOCK = threading.Lock()
+
+
+def set_io_workers(workers: int = 8) -> None:
+    """
+    Sets how many files the ``load_async`` and ``save_async`` methods of
+    pictures and sounds may decode or encode at once. The default is 8.
+    Jobs already running finish on the old threads.
+
+    :param int workers:
+    :raises ValueError: if ``workers`` is not positive
+    """
+    global __IO_POOL, __IO_WORKERS  # pylint: disable=global-statement
+    workers = int(workers)
+    if workers < 1:
+        raise ValueError(f"In MediaComp.files.set_io_workers: workers must be positive, "
+                         f"actually {workers}")
+    with __IO_LOCK:
+        if __IO_POOL is not None and workers != __IO_WORKERS:
+            __IO_POOL.shutdown(wait=False)
+            __IO_POOL = None
+        __IO_WORKERS = workers
+
+
+async def run_in_io_pool(function: typing.Callable[..., T], *args: typing.Any,
+                         **kwargs: typing.Any) -> T:
+    """
+    Runs ``function(*args, **kwargs)`` on the shared pool of threads set up
+    by :py:func:`set_io_workers` and waits for it without blocking the event loop.
+
+    :param function:
+    :return: what ``function`` returns
+    """
+    global __IO_POOL  # pylint: disable=global-statement
+    with __IO_LOCK:
+        if __IO_POOL is None:
+            __IO_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=__IO_WORKERS,
+                                                              thread_name_prefix="MediaComp-io")
+        pool = __IO_POOL
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, functools.partial(function, *args, **kwargs))
@@ -15,15 +15,40 @@ Module docstring goes here!
 import base64
 
 # module io is standard in Python 3: https://docs.python.org/3/library/io.html
-# using io.BytesIO in Picture.to_base64
+# using io.BytesIO in _encode_for_display
 import io
 
 import os
 
 import pathlib
 
+import collections
 import collections.abc
 
+# module glob is standard in Python 3: https://docs.python.org/3/library/glob.html
+# used to find the files named by a pattern in Picture.from_files
+import glob
+
+# modules concurrent.futures and pickle are standard in Python 3
+# used to run per-pixel loops in worker processes in Picture._run_pixels
+import concurrent.futures
+import pickle
+
+# module tempfile is standard in Python 3: https://docs.python.org/3/library/tempfile.html
+# used by Picture.save to write a .npy file over the one a picture is mapped from
+import tempfile
+
+# module threading is standard in Python 3: https://docs.python.org/3/library/threading.html
+# used for the shared thread pool in _for_each_band
+import threading
+
+# module zlib is standard in Python 3: https://docs.python.org/3/library/zlib.html
+# using zlib.adler32 to notice changes to pictures whose arrays were handed out
+import zlib
+
+# module weakref is standard in Python 3: https://docs.python.org/3/library/weakref.html
+# used to track which copy-on-write pictures share a buffer
+import weakref
 
 # module typing is standard in Python 3.5+: https://docs.python.org/3/library/typing.html
 # used for type hints used in static type checking in PEP 484
@@ -35,6 +60,9 @@ import collections.abc
 # still needs to be done
 import typing
 
+# suppress mypy "error: No library stub file for module 'numpy'"
+import numpy  # type: ignore
+
 # PIL refers to the Pillow library installed by default in the Anaconda distribution of Python
 # PIL is the Python Image Library, Pillow is a fork of PIL
 # For documentation on Pillow, see: https://pillow.readthedocs.io/en/stable/
@@ -96,12 +124,15 @@ RGB = typing.Tuple[int, int, int]
 ImageSize = typing.Tuple[int, int]
 Point = typing.Tuple[int, int]
 PointSequence = typing.Sequence[Point]
+Box = typing.Tuple[int, int, int, int]
 BaseRGB = colors.BaseRGB
 PixelInfoTuple = typing.Tuple[Point, RGB]
 Transform = typing.Callable[['PixelInfo'], Color]
 Transform2 = typing.Callable[[PixelInfoTuple], PixelInfoTuple]
 Predicate = typing.Callable[['PixelInfo'], bool]
 Combine = typing.Callable[['PixelInfo', 'PixelInfo'], Color]
+Channels = typing.Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+ArrayTransform = typing.Callable[[numpy.ndarray, numpy.ndarray, numpy.ndarray], Channels]
 
 
 def type_error_message(fun_name: str, param_name: str, expected: str, actual: typing.Any) -> str:
@@ -163,8 +194,8 @@ class Pixel(PixelInfo):
     Class level docstring goes here
     """
 
-    def __init__(self, xy: Point, pixel_access: PixelAccess):
-        self.__pixel_access: PixelAccess = pixel_access
+    def __init__(self, xy: Point, picture: 'Picture'):
+        self.__picture: 'Picture' = picture
         super().__init__(xy)
 
     # Overrides PixelInfo.__str__ method
@@ -178,7 +209,7 @@ class Pixel(PixelInfo):
 
         :type: colors.Color
         """
-        rgb: RGB = self.__pixel_access[self._xy]
+        rgb: RGB = self.rgb
         return colors.Color(rgb[0], rgb[1], rgb[2])
 
     @color.setter
@@ -200,8 +231,9 @@ class Pixel(PixelInfo):
     @red.setter
     def red(self, value: int) -> None:
         value = min(255, max(0, int(value)))
-        rgb: RGB = self.__pixel_access[self._xy]
-        self.__pixel_access[self._xy] = (value, rgb[1], rgb[2])
+        picture = self.__picture
+        rgb: RGB = picture._get_rgb(self._xy)  # pylint: disable=protected-access
+        picture._set_rgb(self._xy, (value, rgb[1], rgb[2]))  # pylint: disable=protected-access
 
     # Overrides BaseRGB.green property getter
     @property
@@ -215,8 +247,9 @@ class Pixel(PixelInfo):
     @green.setter
     def green(self, value: int) -> None:
         value = min(255, max(0, int(value)))
-        rgb: RGB = self.__pixel_access[self._xy]
-        self.__pixel_access[self._xy] = (rgb[0], value, rgb[2])
+        picture = self.__picture
+        rgb: RGB = picture._get_rgb(self._xy)  # pylint: disable=protected-access
+        picture._set_rgb(self._xy, (rgb[0], value, rgb[2]))  # pylint: disable=protected-access
 
     # Overrides BaseRGB.blue property getter
     @property
@@ -231,8 +264,9 @@ class Pixel(PixelInfo):
     @blue.setter
     def blue(self, value: int) -> None:
         value = min(255, max(0, int(value)))
-        rgb: RGB = self.__pixel_access[self._xy]
-        self.__pixel_access[self._xy] = (rgb[0], rgb[1], value)
+        picture = self.__picture
+        rgb: RGB = picture._get_rgb(self._xy)  # pylint: disable=protected-access
+        picture._set_rgb(self._xy, (rgb[0], rgb[1], value))  # pylint: disable=protected-access
 
     # Overrides BaseRGB.rgb property getter
     @property
@@ -242,12 +276,12 @@ class Pixel(PixelInfo):
 
         :type: RGB
         """
-        rgb: RGB = self.__pixel_access[self._xy]
+        rgb: RGB = self.__picture._get_rgb(self._xy)  # pylint: disable=protected-access
         return int(rgb[0]), int(rgb[1]), int(rgb[2])
 
     @rgb.setter
     def rgb(self, value: RGB) -> None:
-        self.__pixel_access[self._xy] = value
+        self.__picture._set_rgb(self._xy, value)  # pylint: disable=protected-access
 
 
 class TextStyle:
@@ -321,6 +355,11 @@ class TextStyle:
         return self.__size
 
 
+def _drawing_box(x_1: int, y_1: int, x_2: int, y_2: int) -> Box:
+    """ the pixels a shape drawn by PIL between two corners, both included, may touch """
+    return min(x_1, x_2), min(y_1, y_2), max(x_1, x_2) + 1, max(y_1, y_2) + 1
+
+
 # class PILImage has no pixel-level operations and is agnostic about how many and what kind
 # of channels are in the image. Such things will be found in subclasseses of PILImage
 class PILImage:
@@ -329,6 +368,12 @@ class PILImage:
     """
     def __init__(self, pil_image: PIL.Image.Image):
         self._pil_image = pil_image
+        self.__version: int = 0
+        self.__dirty_box: typing.Optional[Box] = None
+        # (image, ImageDraw for it), reused by the drawing methods
+        self.__draw: typing.Optional[typing.Tuple[PIL.Image.Image, PIL.ImageDraw.ImageDraw]] = None
+        # what the owners that draw in batches have left to draw, see _defer
+        self.__pending: typing.List[typing.Callable[[], None]] = []
 
     @property
     def height(self) -> int:
@@ -367,8 +412,130 @@ class PILImage:
         :return: the copy
         :rtype PILImage:
         """
+        self._run_pending()
         return PILImage(self._pil_image.copy())
 
+    @property
+    def version(self) -> int:
+        """
+        a number that goes up whenever the pixels may have changed: through
+        pixels, ``__setitem__``, ``set_color``, drawing, ``copy_into`` or in-place
+        operations. Anything computed from the pixels can be kept for as long as
+        this stays the same. Changes made through arrays returned by
+        ``Picture.as_array`` are not noticed, call :py:meth:`mark_dirty` after them.
+        A view made with ``picture[left:right, top:bottom]`` notices the changes
+        made to the same pixels through the picture and its other views.
+
+        :type: int
+        """
+        return self.__version
+
+    @property
+    def dirty_box(self) -> typing.Optional[Box]:
+        """
+        (left, top, right, bottom), with right and bottom excluded, of the
+        smallest rectangle holding every pixel that may have changed since
+        :py:meth:`clear_dirty` was last called, or None if none have
+
+        :type: Optional[Box]
+        """
+        return self.__dirty_box
+
+    def mark_dirty(self, box: typing.Optional[Box] = None) -> None:
+        """
+        Records that the pixels inside ``box`` (left, top, right, bottom), or
+        the whole image if it is None, may have changed: :py:attr:`version`
+        goes up and ``box`` is added to :py:attr:`dirty_box`.
+
+        :param box:
+        """
+        self.__version += 1
+        if box is None:
+            box = (0, 0, self.width, self.height)
+        left = max(0, int(box[0]))
+        top = max(0, int(box[1]))
+        right = min(self.width, int(box[2]))
+        bottom = min(self.height, int(box[3]))
+        if left >= right or top >= bottom:
+            return
+        if self.__dirty_box is not None:
+            (old_left, old_top, old_right, old_bottom) = self.__dirty_box
+            left = min(left, old_left)
+            top = min(top, old_top)
+            right = max(right, old_right)
+            bottom = max(bottom, old_bottom)
+        self.__dirty_box = (left, top, right, bottom)
+
+    def _mark_pixel_dirty(self, x: int, y: int) -> None:  # pylint: disable=invalid-name
+        """ mark_dirty for the one pixel (x, y), which must be inside the image """
+        self.__version += 1
+        box = self.__dirty_box
+        if box is None:
+            self.__dirty_box = (x, y, x + 1, y + 1)
+        elif not (box[0] <= x < box[2] and box[1] <= y < box[3]):
+            self.__dirty_box = (min(x, box[0]), min(y, box[1]),
+                                max(x + 1, box[2]), max(y + 1, box[3]))
+
+    def clear_dirty(self) -> typing.Optional[Box]:
+        """
+        Starts collecting changed pixels afresh, typically after the changes in
+        :py:attr:`dirty_box` have been dealt with.
+
+        :return: the dirty box before it was cleared
+        :rtype: Optional[Box]
+        """
+        (dirty_box, self.__dirty_box) = (self.__dirty_box, None)
+        return dirty_box
+
+    # overridden by Picture subclass
+    def _detach(self) -> None:
+        """ makes sure writes to this image do not show up in any other image """
+
+    # extended by Picture subclass
+    def _before_write(self, box: typing.Optional[Box] = None) -> None:
+        """ called before anything changes the pixels of this image inside box """
+        self._run_pending()
+        self._detach()
+        self.mark_dirty(box)
+
+    def _defer(self, draw: typing.Callable[[], None]) -> None:
+        """
+        makes draw run the next time the pixels of this image are read or
+        changed, for owners like turtles.World that draw on it in batches.
+        Any number of owners can do so, each one's draw runs once.
+        """
+        if draw not in self.__pending:
+            self.__pending.append(draw)
+
+    def _run_pending(self) -> None:
+        """ runs the functions given to _defer that have not run yet, in order """
+        if self.__pending:
+            (pending, self.__pending) = (self.__pending, [])
+            for draw in pending:
+                draw()
+
+    def _draw(self) -> PIL.ImageDraw.ImageDraw:
+        """ an ImageDraw for the image, made once rather than for every shape """
+        if self.__draw is None or self.__draw[0] is not self._pil_image:
+            self.__draw = (self._pil_image, PIL.ImageDraw.Draw(self._pil_image))
+        return self.__draw[1]
+
+    def drawing(self) -> 'Drawing':
+        """
+        Starts drawing many shapes at once::
+
+            with picture.drawing() as draw:
+                draw.lines(segments, colors.Colors.red)
+                draw.rects(boxes, colors.Colors.blue, filled=True)
+
+        See :py:class:`Drawing`. The :py:attr:`version` and
+        :py:attr:`dirty_box` change once, when the ``with`` statement ends.
+
+        :return:
+        :rtype: Drawing
+        """
+        return Drawing(self)
+
     def set_color(self, color: colors.BaseRGB = colors.Colors.black):
         """
         Write better docstring
@@ -376,8 +543,9 @@ class PILImage:
         :param color:
         :return:
         """
-        draw = PIL.ImageDraw.Draw(self._pil_image)
-        draw.rectangle([(0, 0), (self.width, self.height)], fill=color)
+        self._before_write()
+        draw = self._draw()
+        draw.rectangle([(0, 0), (self.width, self.height)], fill=color.rgb)
 
     def copy_into(self, big_picture: 'PILImage', left: int, top: int):
         """
@@ -388,6 +556,9 @@ class PILImage:
         :param int top:
         :return:
         """
+        self._run_pending()
+        big_picture._before_write(  # pylint: disable=protected-access
+            (left, top, left + self.width, top + self.height))
         big_picture._pil_image.paste(self._pil_image, (left, top))  # pylint: disable=protected-access
 
     def add_arc(self, x: int, y: int,  # pylint: disable=invalid-name;  # pylint: disable=too-many-arguments
@@ -417,7 +588,8 @@ class PILImage:
             raise TypeError(type_error_message("PILImage.add_arc", "c", "Color", color))
 
         fill_color: RGB = color.rgb
-        draw = PIL.ImageDraw.Draw(self._pil_image)
+        self._before_write(_drawing_box(x, y, x + width, y + height))
+        draw = self._draw()
         bounding_box: PointSequence = [(x, y), (x + width, y + height)]
         draw.arc(bounding_box, start=start, end=start+angle, fill=fill_color, width=1)
 
@@ -448,7 +620,8 @@ class PILImage:
             raise TypeError(type_error_message("PILImage.add_arc_filled", "color", "Color", color))
         fill_color: RGB = color.rgb
         bounding_box: PointSequence = [(x, y), (x + width, y + height)]
-        draw = PIL.ImageDraw.Draw(self._pil_image)
+        self._before_write(_drawing_box(x, y, x + width, y + height))
+        draw = self._draw()
         draw.pieslice(bounding_box, start=start, end=start+angle, fill=fill_color, width=1)
 
     def add_line(self, start_x: int, start_y: int,  # pylint: disable=too-many-arguments
@@ -472,7 +645,8 @@ class PILImage:
         if not isinstance(color, colors.BaseRGB):
             raise TypeError(type_error_message("PILImage.add_line", "color", "Color", color))
         bounding_box: PointSequence = [(start_x, start_y), (start_x + width, start_y + height)]
-        draw = PIL.ImageDraw.Draw(self._pil_image)
+        self._before_write(_drawing_box(start_x, start_y, start_x + width, start_y + height))
+        draw = self._draw()
         draw.line(bounding_box, fill=color.rgb, width=1)
 
     def add_oval(self, center_x: int, center_y: int,  # pylint: disable=too-many-arguments
@@ -495,7 +669,8 @@ class PILImage:
         if not isinstance(color, colors.BaseRGB):
             raise TypeError(type_error_message("PILImage.add_oval", "color", "Color", color))
         bounding_box: PointSequence = [(center_x, center_y), (center_x + width, center_y + height)]
-        draw = PIL.ImageDraw.Draw(self._pil_image)
+        self._before_write(_drawing_box(center_x, center_y, center_x + width, center_y + height))
+        draw = self._draw()
         draw.ellipse(bounding_box, outline=color.rgb, width=1)
 
     def add_oval_filled(self, center_x: int, center_y: int,  # pylint: disable=too-many-arguments
@@ -521,7 +696,8 @@ class PILImage:
         left_top = (center_x - width//2, center_y - height//2)
         right_bottom = (center_x + width//2, center_y + width//2)
         bounding_box = [left_top, right_bottom]
-        draw = PIL.ImageDraw.Draw(self._pil_image)
+        self._before_write(_drawing_box(*left_top, *right_bottom))
+        draw = self._draw()
         draw.ellipse(bounding_box, outline=color.rgb, fill=color.rgb, width=1)
 
     def add_rect(self, left: int, top: int,  # pylint: disable=too-many-arguments
@@ -550,7 +726,8 @@ class PILImage:
         height = int(height)
         if not isinstance(color, colors.BaseRGB):
             raise TypeError(type_error_message("PILImage.add_rect", "color", "Color", color))
-        draw = PIL.ImageDraw.Draw(self._pil_image)
+        self._before_write(_drawing_box(left, top, left + width, top + height))
+        draw = self._draw()
         draw.rectangle([(left, top), (left + width, top + height)], outline=color.rgb, width=1)
 
     def add_rect_filled(self, left: int, top: int, width: int, height: int,  # pylint: disable=too-many-arguments
@@ -572,7 +749,8 @@ class PILImage:
         height = int(height)
         if not isinstance(color, colors.BaseRGB):
             raise TypeError(type_error_message("PILImage.add_rect_filled", "color", "Color", color))
-        draw = PIL.ImageDraw.Draw(self._pil_image)
+        self._before_write(_drawing_box(left, top, left + width, top + height))
+        draw = self._draw()
         draw.rectangle([(left, top), (left+width, top+height)], fill=color.rgb, width=1)
 
     def add_text(self, x_pos: int, y_pos: int, text: str,
@@ -592,8 +770,10 @@ class PILImage:
         text = str(text)
         if not isinstance(color, colors.BaseRGB):
             raise TypeError(type_error_message("PILImage.add_text", "color", "Color", color))
-        draw = PIL.ImageDraw.Draw(self._pil_image)
-        draw.text((x_pos, y_pos), text, fill=color.rgb)
+        # the ImageDraw has to be fetched again after _before_write, since a
+        # picture sharing its pixels with a copy gets pixels of its own there
+        self._before_write(self._draw().textbbox((x_pos, y_pos), text))
+        self._draw().text((x_pos, y_pos), text, fill=color.rgb)
 
     def add_text_with_style(self, x_pos: int, y_pos: int,  # pylint: disable=too-many-arguments
                             text: str, style: TextStyle,
@@ -619,8 +799,781 @@ class PILImage:
             raise TypeError(type_error_message("PILImage.add_text_styled",
                                                "style",
                                                "TextStyle", style))
-        draw: PIL.ImageDraw.ImageDraw = PIL.ImageDraw.Draw(self._pil_image)
-        draw.text((x_pos, y_pos), text, font=style.font, fill=color.rgb)
+        self._before_write(self._draw().textbbox((x_pos, y_pos), text, font=style.font))
+        self._draw().text((x_pos, y_pos), text, font=style.font, fill=color.rgb)
+
+
+def _shape_array(fun_name: str, shapes: typing.Any, columns: int) -> numpy.ndarray:
+    """ converts a sequence of shapes with columns numbers each into an n x columns array of int """
+    array = numpy.asarray(shapes, dtype=float)
+    if array.size == 0:
+        return numpy.zeros((0, columns), dtype=int)
+    if array.ndim != 2 or array.shape[1] != columns:
+        raise ValueError(f"In MediaComp.pictures.Drawing.{fun_name}: expected a sequence of " +
+                         f"{columns} numbers per shape, actually shape {array.shape}")
+    return array.astype(int)
+
+
+class Drawing:
+    """
+    Draws many shapes on an image with a single ``ImageDraw`` and records the
+    changed pixels once, when the ``with`` statement that
+    :py:meth:`PILImage.drawing` was used in ends.
+
+    Each method takes a whole sequence of shapes (a list of tuples or a
+    ``numpy`` array with one row per shape) and either one color for all of
+    them or a sequence of colors, one per shape. Rectangles and ovals are
+    given as (left, top, width, height) like :py:meth:`PILImage.add_rect`.
+    """
+
+    def __init__(self, image: PILImage):
+        self.__image: PILImage = image
+        self.__box: typing.Optional[Box] = None
+
+    def __enter__(self) -> 'Drawing':
+        return self
+
+    def __exit__(self, *exc_info: typing.Any) -> None:
+        if self.__box is not None:
+            self.__image._before_write(self.__box)  # pylint: disable=protected-access
+            self.__box = None
+
+    def __start(self, fun_name: str, shapes: numpy.ndarray, color: typing.Any
+                ) -> typing.Tuple[PIL.ImageDraw.ImageDraw, typing.List[RGB]]:
+        """ checks the colors, widens the changed box over shapes and returns the ImageDraw """
+        if isinstance(color, colors.BaseRGB):
+            rgbs = [color.rgb] * len(shapes)
+        else:
+            rgbs = []
+            for each in color:
+                if not isinstance(each, colors.BaseRGB):
+                    raise TypeError(type_error_message(f"Drawing.{fun_name}", "color",
+                                                       "Color", each))
+                rgbs.append(each.rgb)
+            if len(rgbs) != len(shapes):
+                raise ValueError(f"In MediaComp.pictures.Drawing.{fun_name}: expected one " +
+                                 f"color per shape, actually {len(rgbs)} for {len(shapes)} shapes")
+        image = self.__image
+        image._run_pending()  # pylint: disable=protected-access
+        image._detach()  # pylint: disable=protected-access
+        if len(shapes) > 0:
+            x_values = shapes[:, 0::2]
+            y_values = shapes[:, 1::2]
+            box = (int(x_values.min()), int(y_values.min()),
+                   int(x_values.max()) + 1, int(y_values.max()) + 1)
+            if self.__box is not None:
+                box = (min(box[0], self.__box[0]), min(box[1], self.__box[1]),
+                       max(box[2], self.__box[2]), max(box[3], self.__box[3]))
+            self.__box = box
+        return image._draw(), rgbs  # pylint: disable=protected-access
+
+    def points(self, points: typing.Any, color: typing.Any = colors.Colors.black) -> None:
+        """
+        Sets the color of many pixels
+
+        :param points: (x, y) of each pixel
+        :param color: a Color, or one Color per pixel
+        """
+        shapes = _shape_array("points", points, 2)
+        (draw, rgbs) = self.__start("points", shapes, color)
+        for (point, rgb) in zip(shapes.tolist(), rgbs):
+            draw.point(point, fill=rgb)
+
+    def lines(self, segments: typing.Any, color: typing.Any = colors.Colors.black) -> None:
+        """
+        Draws many separate line segments. A segment that starts where the one
+        before it ended, in the same color, is drawn in one go with it.
+
+        :param segments: (start_x, start_y, end_x, end_y) of each segment
+        :param color: a Color, or one Color per segment
+        """
+        shapes = _shape_array("lines", segments, 4)
+        (draw, rgbs) = self.__start("lines", shapes, color)
+        if len(shapes) == 0:
+            return
+        joined = numpy.all(shapes[1:, :2] == shapes[:-1, 2:], axis=1)
+        if not isinstance(color, colors.BaseRGB):
+            joined &= numpy.all(numpy.diff(numpy.array(rgbs), axis=0) == 0, axis=1)
+        starts = numpy.concatenate(([0], numpy.flatnonzero(~joined) + 1))
+        # each run of joined segments is drawn through the start of its first
+        # segment and the ends of all of its segments
+        firsts = starts + numpy.arange(len(starts))
+        is_first = numpy.zeros(len(shapes) + len(starts), dtype=bool)
+        is_first[firsts] = True
+        points = numpy.empty((len(is_first), 2), dtype=int)
+        points[is_first] = shapes[starts, :2]
+        points[~is_first] = shapes[:, 2:]
+        flat = points.ravel().tolist()
+        bounds = (2 * numpy.append(firsts, len(points))).tolist()
+        for (run, start) in enumerate(starts.tolist()):
+            draw.line(flat[bounds[run]:bounds[run + 1]], fill=rgbs[start], width=1)
+
+    def polyline(self, points: typing.Any, color: colors.BaseRGB = colors.Colors.black) -> None:
+        """
+        Draws line segments joining each point to the next, all in one color
+
+        :param points: (x, y) of each point
+        :param color:
+        """
+        shapes = _shape_array("polyline", points, 2)
+        if not isinstance(color, colors.BaseRGB):
+            raise TypeError(type_error_message("Drawing.polyline", "color", "Color", color))
+        (draw, _) = self.__start("polyline", shapes, color)
+        if len(shapes) > 1:
+            draw.line(shapes.ravel().tolist(), fill=color.rgb, width=1)
+
+    def rects(self, boxes: typing.Any, color: typing.Any = colors.Colors.black,
+              filled: bool = False) -> None:
+        """
+        Draws many rectangles
+
+        :param boxes: (left, top, width, height) of each rectangle
+        :param color: a Color, or one Color per rectangle
+        :param bool filled: fill the rectangles rather than outline them
+        """
+        shapes = self.__corners(_shape_array("rects", boxes, 4))
+        (draw, rgbs) = self.__start("rects", shapes, color)
+        for (corners, rgb) in zip(shapes.tolist(), rgbs):
+            if filled:
+                draw.rectangle(corners, fill=rgb, width=1)
+            else:
+                draw.rectangle(corners, outline=rgb, width=1)
+
+    def ovals(self, boxes: typing.Any, color: typing.Any = colors.Colors.black,
+              filled: bool = False) -> None:
+        """
+        Draws many ovals
+
+        :param boxes: (left, top, width, height) of the rectangle around each oval
+        :param color: a Color, or one Color per oval
+        :param bool filled: fill the ovals rather than outline them
+        """
+        shapes = self.__corners(_shape_array("ovals", boxes, 4))
+        (draw, rgbs) = self.__start("ovals", shapes, color)
+        for (corners, rgb) in zip(shapes.tolist(), rgbs):
+            draw.ellipse(corners, outline=rgb, fill=rgb if filled else None, width=1)
+
+    def text(self, x_pos: int, y_pos: int, text: str,
+             color: colors.BaseRGB = colors.Colors.black,
+             style: typing.Optional[TextStyle] = None) -> None:
+        """
+        Draws text with its top left corner at (x_pos, y_pos)
+
+        :param int x_pos:
+        :param int y_pos:
+        :param str text:
+        :param color:
+        :param TextStyle style: font to use, or None for the default font
+        """
+        if not isinstance(color, colors.BaseRGB):
+            raise TypeError(type_error_message("Drawing.text", "color", "Color", color))
+        font = None if style is None else style.font
+        draw = self.__image._draw()  # pylint: disable=protected-access
+        (left, top, right, bottom) = draw.textbbox((int(x_pos), int(y_pos)), str(text), font=font)
+        (draw, _) = self.__start("text", numpy.array([[left, top, right - 1, bottom - 1]]), color)
+        draw.text((int(x_pos), int(y_pos)), str(text), font=font, fill=color.rgb)
+
+    @staticmethod
+    def __corners(boxes: numpy.ndarray) -> numpy.ndarray:
+        """ (left, top, width, height) to (left, top, right, bottom) like PILImage.add_rect """
+        corners = boxes.copy()
+        corners[:, 2:] += boxes[:, :2]
+        return corners
+
+
+def _uint8_to_channels(region: numpy.ndarray) -> Channels:
+    """ splits an height x width x 3 array of uint8 into int32 red, green and blue arrays """
+    region = region.astype(numpy.int32)
+    return region[:, :, 0], region[:, :, 1], region[:, :, 2]
+
+
+def _store_channels(region: numpy.ndarray, channels: typing.Sequence[typing.Any]) -> None:
+    """
+    writes red, green and blue arrays (or scalars) into an height x width x 3
+    array of uint8, clamping values to 0-255 the same way Color does
+    """
+    if len(channels) != 3:
+        raise ValueError("In MediaComp.pictures: vectorized transform must return " +
+                         f"3 channels, actually returned {len(channels)}")
+    for index, channel in enumerate(channels):
+        region[:, :, index] = numpy.clip(channel, 0, 255)
+
+
+def _check_mode(fun_name: str, mode: str, modes: typing.Sequence[str]) -> None:
+    """ raises ValueError if mode is not one of modes """
+    if mode not in modes:
+        raise ValueError(f"In MediaComp.pictures.{fun_name}: mode expected one of " +
+                         f"{', '.join(modes)}, actually {mode!r}")
+
+
+def _new_buffer(width: int, height: int) -> numpy.ndarray:
+    """ allocates the height x width x 4 array of uint8 that backs a Picture """
+    buffer = numpy.empty((max(0, int(height)), max(0, int(width)), 4), dtype=numpy.uint8)
+    buffer[:, :, 3] = 255
+    return buffer
+
+
+def _shared_buffer(array: numpy.ndarray) -> typing.Optional[numpy.ndarray]:
+    """
+    finds a height x width x 4 buffer with the same memory as ``array``,
+    or returns None if ``array`` can not be used without copying it
+    """
+    if array.dtype != numpy.uint8 or array.ndim != 3 or not array.flags.writeable:
+        return None
+    height, width, depth = array.shape
+    if depth == 4 and array.flags.c_contiguous:
+        return array
+    if depth != 3 or array.strides != (4 * width, 4, 1):
+        return None
+    # an RGB view of an RGBX buffer, such as the one returned by Picture.as_array
+    address: int = array.__array_interface__["data"][0]
+    owner = array.base
+    while isinstance(owner, numpy.ndarray):
+        if owner.flags.c_contiguous and owner.nbytes >= height * width * 4 and \
+                owner.__array_interface__["data"][0] == address:
+            return owner.reshape(-1)[:height * width * 4].reshape(height, width, 4)
+        owner = owner.base
+    return None
+
+
+def _map_buffer(buffer: numpy.ndarray) -> PIL.Image.Image:
+    """
+    wraps a height x width x 4 array of uint8 in a PIL image without copying it
+
+    PIL keeps RGB images as 4 bytes per pixel anyway, so the memory is mapped as
+    an RGBX image. PIL marks mapped images read-only, which makes ImageDraw and
+    paste quietly switch to a private copy, so that flag is cleared here.
+
+    The rows need not be next to each other (the buffer of a view made by
+    Picture.__getitem__ is a slice of a wider buffer), PIL is told the row stride.
+    PIL checks the buffer is height strides long, which for a view in the bottom
+    rows of its parent runs past the parent's memory, so it gets a 1-D array of
+    that length. Only the first width pixels of each row are ever touched.
+    """
+    height, width = buffer.shape[:2]
+    if width == 0 or height == 0:
+        return PIL.Image.new("RGBX", (width, height))
+    stride: int = buffer.strides[0]
+    data = numpy.lib.stride_tricks.as_strided(buffer, shape=(height * stride,), strides=(1,))
+    image = PIL.Image.frombuffer("RGBX", (width, height), data, "raw", "RGBX", stride, 1)
+    image.readonly = 0
+    return image
+
+
+#
+# Tracing per-pixel transforms into numpy array expressions
+#
+# Picture.map and friends call the user's transform once with a _SymbolicPixel
+# whose red, green, blue, x and y are _Symbol objects. Arithmetic and comparisons
+# on a _Symbol just record another _Symbol, so the value the transform returns is
+# an expression graph that _Kernel evaluates over whole arrays of pixels.
+# Anything that needs an actual value (if statements, int(), math.sqrt, ...)
+# raises TracingError and the caller falls back to calling the transform per pixel.
+#
+class TracingError(TypeError):
+    """
+    Raised when a transform can not be traced into an array expression,
+    for example because it branches on a pixel value or converts one to ``int``
+    """
+
+
+def _to_uint8_array(value: numpy.ndarray) -> numpy.ndarray:
+    """ the array version of BaseRGB.to_uint8, int() truncates toward zero """
+    return numpy.clip(value, 0, 255).astype(numpy.int64)
+
+
+def _round_array(value: numpy.ndarray, ndigits: typing.Optional[int] = None) -> numpy.ndarray:
+    """ the array version of round(), which returns an int when ndigits is None """
+    if ndigits is None:
+        return numpy.round(value).astype(numpy.int64)
+    return numpy.round(value, ndigits)
+
+
+def _power_array(base: typing.Any, exponent: typing.Any) -> numpy.ndarray:
+    """ the array version of **, done in floating point since Python ints do not overflow """
+    return numpy.power(numpy.asarray(base, dtype=numpy.float64), exponent)
+
+
+_OPERATIONS: typing.Dict[str, typing.Callable[..., typing.Any]] = {
+    "add": numpy.add,
+    "sub": numpy.subtract,
+    "mul": numpy.multiply,
+    "truediv": numpy.true_divide,
+    "floordiv": numpy.floor_divide,
+    "mod": numpy.remainder,
+    "pow": _power_array,
+    "neg": numpy.negative,
+    "pos": numpy.positive,
+    "abs": numpy.absolute,
+    "lt": numpy.less,
+    "le": numpy.less_equal,
+    "gt": numpy.greater,
+    "ge": numpy.greater_equal,
+    "eq": numpy.equal,
+    "ne": numpy.not_equal,
+    "and": numpy.bitwise_and,
+    "or": numpy.bitwise_or,
+    "xor": numpy.bitwise_xor,
+    "sqrt": numpy.sqrt,
+    "uint8": _to_uint8_array,
+    "round": _round_array,
+    "floor": lambda value: numpy.floor(value).astype(numpy.int64),
+    "ceil": lambda value: numpy.ceil(value).astype(numpy.int64),
+    "trunc": lambda value: numpy.trunc(value).astype(numpy.int64),
+}
+
+# errors that make a traced kernel give up on a band of pixels and let the
+# per-pixel code produce the result (or the exception) the user expects
+_KERNEL_ERRORS = (ArithmeticError, FloatingPointError, TypeError, ValueError)
+
+
+def _binary(operation: str, reflected: bool = False) -> typing.Callable[..., '_Symbol']:
+    """ makes the _Symbol method for a binary operator """
+    if reflected:
+        return lambda self, other: _Symbol(operation, other, self)
+    return lambda self, other: _Symbol(operation, self, other)
+
+
+def _unary(operation: str) -> typing.Callable[..., '_Symbol']:
+    """ makes the _Symbol method for a unary operator """
+    return lambda self: _Symbol(operation, self)
+
+
+class _Symbol:
+    """
+    A node of the expression graph recorded while tracing a transform.
+
+    ``operation`` is a key of ``_OPERATIONS`` or ``"input"``, in which case
+    ``arguments`` is ``(slot, channel)``: the pixel argument the value came
+    from and one of ``"red"``, ``"green"``, ``"blue"``, ``"x"`` or ``"y"``.
+    """
+    __slots__ = ("operation", "arguments")
+
+    def __init__(self, operation: str, *arguments: typing.Any):
+        self.operation: str = operation
+        self.arguments: typing.Tuple[typing.Any, ...] = arguments
+
+    def __bool__(self) -> bool:
+        raise TracingError("the transform branches on the value of a pixel")
+
+    def __int__(self) -> int:
+        raise TracingError("the transform converts a pixel value to int")
+
+    def __float__(self) -> float:
+        raise TracingError("the transform converts a pixel value to float")
+
+    def __repr__(self) -> str:
+        return f"_Symbol({self.operation!r}, {', '.join(map(repr, self.arguments))})"
+
+    __add__ = _binary("add")
+    __radd__ = _binary("add", True)
+    __sub__ = _binary("sub")
+    __rsub__ = _binary("sub", True)
+    __mul__ = _binary("mul")
+    __rmul__ = _binary("mul", True)
+    __truediv__ = _binary("truediv")
+    __rtruediv__ = _binary("truediv", True)
+    __floordiv__ = _binary("floordiv")
+    __rfloordiv__ = _binary("floordiv", True)
+    __mod__ = _binary("mod")
+    __rmod__ = _binary("mod", True)
+    __pow__ = _binary("pow")
+    __rpow__ = _binary("pow", True)
+    __and__ = _binary("and")
+    __rand__ = _binary("and", True)
+    __or__ = _binary("or")
+    __ror__ = _binary("or", True)
+    __xor__ = _binary("xor")
+    __rxor__ = _binary("xor", True)
+    __lt__ = _binary("lt")
+    __le__ = _binary("le")
+    __gt__ = _binary("gt")
+    __ge__ = _binary("ge")
+    __eq__ = _binary("eq")  # type: ignore
+    __ne__ = _binary("ne")  # type: ignore
+    __neg__ = _unary("neg")
+    __pos__ = _unary("pos")
+    __abs__ = _unary("abs")
+    __floor__ = _unary("floor")
+    __ceil__ = _unary("ceil")
+    __trunc__ = _unary("trunc")
+    __hash__ = None  # type: ignore
+
+    def __round__(self, ndigits: typing.Optional[int] = None) -> '_Symbol':
+        return _Symbol("round", self, ndigits)
+
+    def to_uint8(self) -> '_Symbol':
+        """ symbolic version of :py:meth:`.colors.BaseRGB.to_uint8` """
+        return _Symbol("uint8", self)
+
+    def sqrt(self) -> '_Symbol':
+        """ symbolic version of ``math.sqrt`` used by :py:meth:`.colors.BaseRGB.distance` """
+        return _Symbol("sqrt", self)
+
+
+class _SymbolicPixel(PixelInfo):
+    """
+    The PixelInfo a transform is called with while it is being traced
+    """
+
+    def __init__(self, slot: int):
+        self.__slot = slot
+        super().__init__((0, 0), rgb=(_Symbol("input", slot, "red"),
+                                      _Symbol("input", slot, "green"),
+                                      _Symbol("input", slot, "blue")))
+
+    @property
+    def x(self) -> typing.Any:
+        return _Symbol("input", self.__slot, "x")
+
+    @property
+    def y(self) -> typing.Any:
+        return _Symbol("input", self.__slot, "y")
+
+
+class _Kernel:
+    """
+    A traced transform (or predicate) compiled into numpy operations on
+    whole bands of pixels. ``outputs`` holds one expression per result value,
+    each either a _Symbol or a constant.
+    """
+
+    def __init__(self, outputs: typing.Sequence[typing.Any]):
+        self.outputs: typing.List[typing.Any] = list(outputs)
+
+    @staticmethod
+    def trace_color(function: typing.Callable[..., colors.BaseRGB],
+                    arity: int = 1) -> typing.Optional['_Kernel']:
+        """
+        traces a function of ``arity`` PixelInfo arguments that returns a Color,
+        or returns None if the function can not be traced
+        """
+        try:
+            color = function(*[_SymbolicPixel(slot) for slot in range(arity)])
+            if not isinstance(color, colors.BaseRGB):
+                return None
+            return _Kernel(color.rgb)
+        except Exception:  # pylint: disable=broad-except
+            return None
+
+    @staticmethod
+    def trace_predicate(function: Predicate) -> typing.Optional['_Kernel']:
+        """
+        traces a predicate on a PixelInfo, or returns None if it can not be traced
+        """
+        try:
+            result = function(_SymbolicPixel(0))
+        except Exception:  # pylint: disable=broad-except
+            return None
+        if not isinstance(result, _Symbol):
+            try:
+                result = bool(result)
+            except Exception:  # pylint: disable=broad-except
+                return None
+        return _Kernel([result])
+
+    def __add__(self, other: '_Kernel') -> '_Kernel':
+        return _Kernel(self.outputs + other.outputs)
+
+    def evaluate(self, pixels: typing.Sequence[numpy.ndarray], left: int, top: int
+                 ) -> typing.List[typing.Any]:
+        """
+        evaluates the outputs over bands of pixels
+
+        :param pixels: one height x width x 3 array per traced argument
+        :param int left: x coordinate of the first column of the band
+        :param int top: y coordinate of the first row of the band
+        :return: one array (or constant) per output
+        """
+        height, width = pixels[0].shape[:2]
+        inputs: typing.Dict[typing.Tuple[int, str], numpy.ndarray] = {}
+        values: typing.Dict[int, typing.Any] = {}
+
+        def value_of(node: typing.Any) -> typing.Any:
+            if not isinstance(node, _Symbol):
+                return node
+            key = id(node)
+            if key not in values:
+                if node.operation == "input":
+                    values[key] = input_of(*node.arguments)
+                else:
+                    arguments = [value_of(argument) for argument in node.arguments]
+                    if node.operation == "round" and arguments[1] is None:
+                        arguments.pop()
+                    values[key] = _OPERATIONS[node.operation](*arguments)
+            return values[key]
+
+        def input_of(slot: int, channel: str) -> numpy.ndarray:
+            if (slot, channel) not in inputs:
+                if channel == "x":
+                    value = numpy.arange(left, left + width, dtype=numpy.int64)[numpy.newaxis, :]
+                elif channel == "y":
+                    value = numpy.arange(top, top + height, dtype=numpy.int64)[:, numpy.newaxis]
+                else:
+                    index = ("red", "green", "blue").index(channel)
+                    value = pixels[slot][:, :, index].astype(numpy.int64)
+                inputs[slot, channel] = value
+            return inputs[slot, channel]
+
+        with numpy.errstate(divide="raise", invalid="raise", over="raise"):
+            return [value_of(output) for output in self.outputs]
+
+
+class _ProbePixel(PixelInfo):
+    """
+    A PixelInfo that notices when a transform asks for its coordinates
+    """
+
+    def __init__(self, rgb: RGB):
+        super().__init__((0, 0), rgb=rgb)
+        self.used_coordinates: bool = False
+
+    @property
+    def x(self) -> int:
+        self.used_coordinates = True
+        return super().x
+
+    @property
+    def y(self) -> int:
+        self.used_coordinates = True
+        return super().y
+
+
+def _gray_tables(transform: Transform) -> typing.Tuple[typing.List[numpy.ndarray], bool]:
+    """
+    builds a lookup table per channel by calling transform on the 256 shades of gray
+
+    :return: the tables and whether transform asked for a pixel's coordinates
+    """
+    tables = numpy.empty((3, 256), dtype=numpy.uint8)
+    used_coordinates = False
+    for value in range(256):
+        pixel = _ProbePixel((value, value, value))
+        tables[:, value] = transform(pixel).rgb
+        used_coordinates = used_coordinates or pixel.used_coordinates
+    return list(tables), used_coordinates
+
+
+def _channel_tables(fun_name: str, channels: typing.Sequence[typing.Any]
+                    ) -> typing.List[typing.Optional[numpy.ndarray]]:
+    """
+    converts the red, green and blue arguments of map_channels, each a function,
+    a sequence of 256 values or None, into lookup tables
+    """
+    tables: typing.List[typing.Optional[numpy.ndarray]] = []
+    for table in channels:
+        if table is not None and callable(table):
+            table = [table(value) for value in range(256)]
+        if table is not None:
+            table = numpy.clip(numpy.asarray(table), 0, 255).astype(numpy.uint8)
+            if table.shape != (256,):
+                raise ValueError(f"In MediaComp.pictures.{fun_name}: lookup tables " +
+                                 f"need 256 entries, actually shape {table.shape}")
+        tables.append(table)
+    return tables
+
+
+def _map_distinct_colors(transform: Transform, region: numpy.ndarray) -> bool:
+    """
+    replaces each color in region by transform of that color, calling transform
+    once per distinct color. Gives up, leaving region unchanged and returning False,
+    if there are more than MEMO_MAX_COLORS distinct colors or transform asks for
+    a pixel's coordinates.
+    """
+    height, width = region.shape[:2]
+    packed = (region[:, :, 0].astype(numpy.uint32) << 16) | \
+        (region[:, :, 1].astype(numpy.uint32) << 8) | region[:, :, 2]
+    packed = packed.reshape(-1)
+    if packed.size > MEMO_MAX_COLORS:
+        # a cheap check on a sample before sorting the whole picture: n pixels picked
+        # from D equally common colors repeat a color about n * n / (2 * D) times, so
+        # fewer than half the repeats there would be at MEMO_MAX_COLORS means about
+        # twice as many colors (and more repeats means fewer colors, or uneven ones)
+        sample = packed[numpy.random.RandomState(0).randint(0, packed.size, _MEMO_SAMPLE)]
+        repeats = _MEMO_SAMPLE - len(numpy.unique(sample))
+        if repeats < _MEMO_SAMPLE * _MEMO_SAMPLE / (4 * MEMO_MAX_COLORS):
+            return False
+    distinct, inverse = numpy.unique(packed, return_inverse=True)
+    if len(distinct) > MEMO_MAX_COLORS:
+        return False
+    new_colors = numpy.empty((len(distinct), 3), dtype=numpy.uint8)
+    for index, value in enumerate(distinct.tolist()):
+        pixel = _ProbePixel((value >> 16, (value >> 8) & 255, value & 255))
+        new_colors[index] = transform(pixel).rgb
+        if pixel.used_coordinates:
+            return False
+    region[:, :, :] = new_colors[inverse.reshape(-1)].reshape(height, width, 3)
+    return True
+
+
+MEMO_MAX_COLORS = 1 << 16
+"""
+most distinct colors ``Picture.map`` will memoize a transform for in
+``"memo"`` and ``"auto"`` modes before calling it per pixel instead
+"""
+_MEMO_SAMPLE = 1 << 12
+
+
+def _check_workers(fun_name: str, workers: typing.Optional[int]) -> int:
+    """ converts the workers argument of a Picture method to a positive int """
+    if workers is None:
+        return 1
+    workers = int(workers)
+    if workers < 1:
+        raise ValueError(f"In MediaComp.pictures.{fun_name}: workers expected a " +
+                         f"positive number, actually {workers}")
+    return workers
+
+
+def _pixel_loop_in_process(operation: str, functions: typing.Tuple[typing.Callable, ...],
+                           names: typing.Sequence[typing.Tuple[str, typing.Tuple[int, ...]]],
+                           box: typing.Tuple[int, int, int, int]) -> None:
+    """
+    runs in a worker process started by Picture._run_pixels: attaches to the
+    shared memory blocks holding the pictures and runs the per-pixel loop on a band
+    """
+    from multiprocessing import shared_memory  # pylint: disable=import-outside-toplevel
+    blocks = [shared_memory.SharedMemory(name=name) for (name, _) in names]
+    try:
+        pictures = [Picture(buffer=numpy.ndarray(shape, numpy.uint8, buffer=block.buf))
+                    for block, (_, shape) in zip(blocks, names)]
+        pictures[0]._pixel_loop(operation, functions,  # pylint: disable=protected-access
+                                pictures[1] if len(pictures) > 1 else None, box)
+    finally:
+        # the pictures map the shared memory, they must be gone before it is closed
+        pictures = []
+        for block in blocks:
+            block.close()
+
+
+def set_threads(threads: int = 1, band_pixels: int = 1 << 15) -> None:
+    """
+    Configures how the numpy-based picture operations (traced ``map``,
+    ``map_if``, ``combine`` and ``replace_if``, lookup tables, and
+    ``mode="vectorized"``) divide up their work.
+
+    Pictures are processed in bands of whole rows holding about
+    ``band_pixels`` pixels, so the temporary arrays for a band stay in the
+    processor's cache. With ``threads`` greater than 1, bands are run on a
+    shared ``ThreadPoolExecutor`` of that many threads; numpy releases the
+    GIL for its array operations, so they run on several cores at once.
+    Note that vectorized transforms are then called once per band rather
+    than once for the whole picture.
+
+    :param int threads: number of threads, 1 runs every band on the calling thread
+    :param int band_pixels: approximate number of pixels per band
+    :raises ValueError: if either argument is less than 1
+    """
+    global _THREADS, _BAND_PIXELS, _THREAD_POOL  # pylint: disable=global-statement
+    threads = int(threads)
+    band_pixels = int(band_pixels)
+    if threads < 1 or band_pixels < 1:
+        raise ValueError("In MediaComp.pictures.set_threads: threads and band_pixels " +
+                         f"must be positive, actually {threads} and {band_pixels}")
+    with _THREAD_POOL_LOCK:
+        if _THREAD_POOL is not None and threads != _THREADS:
+            _THREAD_POOL.shutdown(wait=False)
+            _THREAD_POOL = None
+        _THREADS = threads
+        _BAND_PIXELS = band_pixels
+
+
+def _thread_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """ the shared thread pool, created the first time it is needed """
+    global _THREAD_POOL  # pylint: disable=global-statement
+    with _THREAD_POOL_LOCK:
+        if _THREAD_POOL is None:
+            _THREAD_POOL = concurrent.futures.ThreadPoolExecutor(
+                max_workers=_THREADS, thread_name_prefix="MediaComp.pictures",
+                initializer=setattr, initargs=(_IN_THREAD_POOL, "active", True))
+        return _THREAD_POOL
+
+
+def _for_each_band(top: int, bottom: int, width: int,
+                   function: typing.Callable[[int, int], None], in_order: bool = False) -> None:
+    """
+    calls function(band_top, band_bottom) for bands of rows small enough
+    that the temporary arrays of a kernel stay in cache, on the shared
+    thread pool if set_threads asked for more than one thread, unless
+    in_order asks for the bands top to bottom on this thread
+    """
+    rows = max(1, _BAND_PIXELS // max(1, width))
+    bands = [(band_top, min(bottom, band_top + rows)) for band_top in range(top, bottom, rows)]
+    # a band that is already running on the pool must not wait for the pool
+    if (in_order or _THREADS <= 1 or len(bands) < 2 or
+            getattr(_IN_THREAD_POOL, "active", False)):
+        for (band_top, band_bottom) in bands:
+            function(band_top, band_bottom)
+        return
+    pool = _thread_pool()
+    futures = [pool.submit(function, band_top, band_bottom) for (band_top, band_bottom) in bands]
+    for future in futures:
+        future.result()
+
+
+_THREADS = 1
+_BAND_PIXELS = 1 << 15
+_THREAD_POOL: typing.Optional[concurrent.futures.ThreadPoolExecutor] = None
+_THREAD_POOL_LOCK = threading.Lock()
+_IN_THREAD_POOL = threading.local()
+
+
+#
+# Memory-mapped pictures
+#
+# A Picture only needs its buffer to be a height x width x 4 array of uint8, so a
+# numpy.memmap of a .npy file works as well as one in RAM: the operating system
+# reads the pages a band of rows touches when it is processed and writes changed
+# ones back. Reading and writing .npy and binary PPM files is done a band of rows
+# at a time so the whole picture never has to be in memory at once.
+#
+
+def _stream_bands(height: int, width: int) -> typing.Iterator[typing.Tuple[int, int]]:
+    """ (top, bottom) of bands of rows that are about _STREAM_BYTES each """
+    rows = max(1, _STREAM_BYTES // max(1, 4 * width))
+    for top in range(0, height, rows):
+        yield top, min(height, top + rows)
+
+
+def _read_ppm_header(file: typing.BinaryIO) -> typing.Optional[typing.Tuple[int, int]]:
+    """
+    reads the header of a binary PPM file with 8 bits per channel and returns
+    (width, height), leaving the file at the first pixel, or returns None if
+    the file is anything else
+    """
+    if file.read(2) != b"P6":
+        return None
+    fields: typing.List[int] = []
+    token = b""
+    while len(fields) < 3:
+        char = file.read(1)
+        if char == b"#":
+            file.readline()
+        elif char.isdigit():
+            token += char
+        elif char.isspace() and token:
+            fields.append(int(token))
+            token = b""
+        elif not char.isspace():
+            return None
+    (width, height, max_value) = fields
+    return (width, height) if max_value == 255 else None
+
+
+_STREAM_BYTES = 1 << 24
+
+
+def _decode_picture(path: pathlib.Path,
+                    max_size: typing.Optional[typing.Tuple[int, int]] = None) -> 'Picture':
+    """ reads a picture file with PIL, for Picture.from_file and the decode cache """
+    img = PIL.Image.open(path)
+    if max_size is not None:
+        # lets the JPEG decoder skip detail by decoding at 1/2, 1/4 or 1/8 scale
+        # while staying at least max_size, then thumbnail shrinks the rest of the way
+        img.draft(None, max_size)
+        img.thumbnail(max_size)
+    img.load()
+    return Picture(img)
 
 
 #
@@ -628,6 +1581,76 @@ class PILImage:
 #
 # All interactions with the filesystem should be here
 # not in superclasses
+#
+# Notebook display
+#
+# Encoding a picture for display is slow, so each Picture keeps the last image it
+# encoded together with its version, which _before_write changes, and the display
+# options it was encoded with. Pictures whose buffer can be changed without going
+# through Picture (see Picture.as_array) are also checked with a checksum.
+#
+
+_DISPLAY_FORMATS = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+
+
+def set_display_options(image_format: str = "png", quality: int = 85, compress_level: int = 1,
+                        max_size: typing.Optional[typing.Tuple[int, int]] = (1600, 1600)
+                        ) -> None:
+    """
+    Configures how pictures are shown in Jupyter notebooks.
+
+    Pictures larger than ``max_size`` (width, height) are shrunk to fit before
+    they are shown, ``None`` always shows the whole picture. They are then
+    encoded as ``"png"`` with ``compress_level`` 0 (fastest, biggest) to 9
+    (slowest, smallest) or as ``"jpeg"`` or ``"webp"`` with ``quality`` 1 to 100,
+    which is much smaller for photos (not every notebook front end shows
+    WebP). The pictures themselves, and what :py:meth:`Picture.save` writes,
+    are not affected.
+
+    :param str image_format: ``"png"``, ``"jpeg"`` or ``"webp"``
+    :param int quality: quality of JPEG and WebP images
+    :param int compress_level: zlib compression level of PNG images
+    :param max_size: largest (width, height) shown, or None
+    :raises ValueError: if an argument is out of range
+    """
+    quality = int(quality)
+    compress_level = int(compress_level)
+    if image_format not in _DISPLAY_FORMATS:
+        raise ValueError("In MediaComp.pictures.set_display_options: image_format expected " +
+                         f"one of {', '.join(_DISPLAY_FORMATS)}, actually {image_format!r}")
+    if not 1 <= quality <= 100 or not 0 <= compress_level <= 9:
+        raise ValueError("In MediaComp.pictures.set_display_options: quality must be 1-100 " +
+                         f"and compress_level 0-9, actually {quality} and {compress_level}")
+    if max_size is not None:
+        max_size = (int(max_size[0]), int(max_size[1]))
+        if max_size[0] < 1 or max_size[1] < 1:
+            raise ValueError("In MediaComp.pictures.set_display_options: max_size must be " +
+                             f"positive, actually {max_size}")
+    _DISPLAY_OPTIONS.update(image_format=image_format, quality=quality,
+                            compress_level=compress_level, max_size=max_size)
+
+
+def _encode_for_display(image: PIL.Image.Image, options: typing.Dict[str, typing.Any]
+                        ) -> typing.Tuple[str, bytes]:
+    """ shrinks and encodes image as the display options say, returns (mime type, bytes) """
+    max_size = options["max_size"]
+    if max_size is not None and (image.width > max_size[0] or image.height > max_size[1]):
+        scale = min(max_size[0] / image.width, max_size[1] / image.height)
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(size, PIL.Image.BILINEAR, reducing_gap=2.0)
+    image = image.convert(mode="RGB")
+    file_like = io.BytesIO()
+    if options["image_format"] == "png":
+        image.save(file_like, format="PNG", compress_level=options["compress_level"])
+    else:
+        image.save(file_like, format=options["image_format"].upper(), quality=options["quality"])
+    return _DISPLAY_FORMATS[options["image_format"]], file_like.getvalue()
+
+
+_DISPLAY_OPTIONS: typing.Dict[str, typing.Any] = {
+    "image_format": "png", "quality": 85, "compress_level": 1, "max_size": (1600, 1600)}
+
+
 #
 # class Picture adds pixel-level operations to PILImage
 # and works only with 3-channel 8-bit/channel images
@@ -636,27 +1659,364 @@ class Picture(PILImage, collections.abc.Iterable):
     """
     Class-level docstrings
     """
-    def __init__(self, pil_image: PIL.Image.Image):
-        if pil_image.mode == "RGB":
-            super().__init__(pil_image)
-        else:
-            super().__init__(pil_image.convert(mode="RGB"))
+    def __init__(self, pil_image: typing.Optional[PIL.Image.Image] = None, *,
+                 buffer: typing.Optional[numpy.ndarray] = None):
+        if buffer is None:
+            if pil_image.mode not in ("RGB", "RGBX"):
+                pil_image = pil_image.convert(mode="RGB")
+            buffer = _new_buffer(pil_image.width, pil_image.height)
+            buffer[:, :, :3] = numpy.asarray(pil_image)[:, :, :3]
+        super().__init__(_map_buffer(buffer))
+        self._buffer: numpy.ndarray = buffer
         self.__pixel_access: PIL.PyAccess.PyAccess = self._pil_image.load()
+        # the pictures sharing _buffer since they were copied from each other
+        self.__sharers: typing.MutableSet['Picture'] = weakref.WeakSet([self])
+        # whether code outside this class may be holding on to _buffer
+        self.__exposed: bool = False
+        # (parent, left, top) of a view made by __getitem__, which passes its changes on
+        self.__parent: typing.Optional[typing.Tuple['Picture', int, int]] = None
+        # the views made of this picture by __getitem__, which are told about its changes
+        self.__views: typing.Optional[typing.MutableSet['Picture']] = None
+        # True when nothing but marking the changed pixels has to happen before a write:
+        # no copies share _buffer, there is no parent or view and nothing is deferred
+        self.__sole: bool = True
+        # encoded images for the version in __rendered_version, see _render
+        self.__rendered: typing.Dict[typing.Tuple, typing.Tuple[str, bytes]] = {}
+        self.__rendered_version: typing.Optional[typing.Tuple[int, typing.Optional[int]]] = None
+
+    def __set_buffer(self, buffer: numpy.ndarray) -> None:
+        self._buffer = buffer
+        self._pil_image = _map_buffer(buffer)
+        self.__pixel_access = self._pil_image.load()
+        self.__sharers = weakref.WeakSet([self])
+
+    def _detach(self) -> None:
+        """ gives this picture a private buffer if it is shared with copies """
+        if len(self.__sharers) > 1:
+            self.__sharers.discard(self)
+            self.__set_buffer(self._buffer.copy())
+
+    def _before_write(self, box: typing.Optional[Box] = None) -> None:
+        self.__before_write(box, None)
+
+    def __before_write(self, box: typing.Optional[Box],
+                       origin: typing.Optional['Picture']) -> None:
+        """ _before_write, for a write passed on by the view origin if it is not None """
+        super()._before_write(box)
+        # until the next copy, view or _defer, single pixels can be written without all this
+        self.__sole = self.__parent is None and not self.__views
+        if box is None:
+            box = (0, 0, self.width, self.height)
+        self.__mark_views(box, origin)
+        if self.__parent is not None:
+            (parent, left, top) = self.__parent
+            parent.__before_write((box[0] + left, box[1] + top, box[2] + left, box[3] + top),
+                                  self)
+
+    def __mark_views(self, box: Box, origin: typing.Optional['Picture']) -> None:
+        """ marks box of this picture as changed in the views that show it, but origin """
+        if not self.__views:
+            return
+        for view in list(self.__views):
+            (_, left, top) = view.__parent
+            view_box = (box[0] - left, box[1] - top, box[2] - left, box[3] - top)
+            if view is not origin and view_box[0] < view.width and view_box[1] < view.height \
+                    and view_box[2] > 0 and view_box[3] > 0:
+                view.mark_dirty(view_box)
+                view.__mark_views(view_box, None)
+
+    def _defer(self, draw: typing.Callable[[], None]) -> None:
+        super()._defer(draw)
+        self.__sole = False
+
+    def _target(self, inplace: bool, box: typing.Optional[Box] = None) -> 'Picture':
+        """ the picture an operation writes to: this one if inplace, otherwise a new copy """
+        if inplace:
+            self._before_write(box)
+            return self
+        self._run_pending()
+        return Picture(buffer=self._buffer.copy())
+
+    def _rgb_view(self) -> numpy.ndarray:
+        """ like as_array, for code in this module that reads or has called _before_write """
+        self._run_pending()
+        return self._buffer[:, :, :3]
+
+    def _get_rgb(self, xy: Point) -> RGB:  # pylint: disable=invalid-name
+        """ the color of one pixel, for Pixel """
+        if not self.__sole:
+            self._run_pending()
+        return self.__pixel_access[xy]
+
+    def _set_rgb(self, xy: Point, rgb: RGB) -> None:  # pylint: disable=invalid-name
+        """ changes the color of one pixel, for Pixel """
+        if self.__sole:
+            self.__pixel_access[xy] = rgb
+            self._mark_pixel_dirty(xy[0], xy[1])
+            return
+        self._before_write((xy[0], xy[1], xy[0] + 1, xy[1] + 1))
+        self.__pixel_access[xy] = rgb
 
     @classmethod
-    def from_file(cls, filename: typing.Union[str, os.PathLike]) -> 'Picture':
+    def from_file(cls, filename: typing.Union[str, os.PathLike],
+                  memmap: typing.Union[str, os.PathLike, None] = None,
+                  max_size: typing.Optional[typing.Tuple[int, int]] = None) -> 'Picture':
         """
         Write better docstring
 
+        Decoded files are kept in the cache of the :py:mod:`.files` module, so
+        reading the same unchanged file again returns a copy-on-write copy of
+        the cached picture without decoding it again.
+
+        A ``.npy`` file saved by :py:meth:`save` is mapped into memory instead of
+        being read, so only the parts of it that are used are loaded, and
+        changes to the picture are not written back to the file.
+
+        With ``memmap`` the pixels are written to a new ``.npy`` file with that
+        name and the picture works on that file as :py:meth:`open_memmap` does.
+        A binary PPM file is copied a band of rows at a time, other formats have
+        to be decoded into memory first.
+
+        With ``max_size=(width, height)`` the picture is shrunk, keeping its
+        proportions, to fit in that size. JPEG files are then decoded at 1/2,
+        1/4 or 1/8 of their size to begin with, which is much faster than
+        decoding the whole picture and then shrinking it, so use this for
+        previews and thumbnails.
+
         :param filename:
+        :param memmap: name of a ``.npy`` file to hold the pixels
+        :param max_size: (width, height) the picture must fit in
         :return:
         :rtype: Picture
+        :raises ValueError: if ``max_size`` is not two positive numbers
+        :raises TypeError: if both ``memmap`` and ``max_size`` are given
         """
         if not isinstance(filename, os.PathLike):
             filename = files.media_path(str(filename))
+        if max_size is not None:
+            if memmap is not None:
+                raise TypeError("In MediaComp.pictures.Picture.from_file: memmap and " +
+                                "max_size can not be used together")
+            max_size = (int(max_size[0]), int(max_size[1]))
+            if max_size[0] <= 0 or max_size[1] <= 0:
+                raise ValueError("In MediaComp.pictures.Picture.from_file: max_size must " +
+                                 f"be positive, actually {max_size}")
+        if memmap is not None:
+            return cls.__decode_to_memmap(filename, memmap)
+        if pathlib.Path(filename).suffix.lower() == ".npy":
+            array = numpy.load(filename, mmap_mode="c")
+            if array.dtype == numpy.uint8 and array.ndim == 3 and array.shape[2] == 4:
+                picture = cls(buffer=array)
+            else:
+                picture = cls.from_array(array)
+            if max_size is not None and \
+                    (picture.width > max_size[0] or picture.height > max_size[1]):
+                scale = min(max_size[0] / picture.width, max_size[1] / picture.height)
+                picture = picture.resize(max(1, round(picture.height * scale)),
+                                         max(1, round(picture.width * scale)))
+            return picture
+        cached: Picture = files.load_cached("picture", filename,
+                                            lambda path: _decode_picture(path, max_size),
+                                            lambda picture: picture._buffer.nbytes, max_size)
+        return cached.copy()
+
+    @classmethod
+    async def load_async(cls, filename: typing.Union[str, os.PathLike],
+                         **options: typing.Any) -> 'Picture':
+        """
+        A coroutine that reads a picture file like :py:meth:`from_file`, which
+        gets the same keyword arguments, on the thread pool of the
+        :py:mod:`.files` module so the event loop is not blocked::
+
+            pictures = await asyncio.gather(*(Picture.load_async(name) for name in names))
+
+        See :py:func:`.files.set_io_workers` for how many files are read at once.
+
+        :param filename:
+        :return:
+        :rtype: Picture
+        """
+        return await files.run_in_io_pool(cls.from_file, filename, **options)
+
+    @classmethod
+    def from_files(cls, filenames: typing.Union[str, os.PathLike,
+                                                typing.Iterable[typing.Union[str, os.PathLike]]],
+                   workers: int = 4, ordered: bool = True,
+                   max_in_flight: typing.Optional[int] = None,
+                   max_size: typing.Optional[typing.Tuple[int, int]] = None
+                   ) -> typing.Iterator['Picture']:
+        """
+        Reads many picture files at once on ``workers`` threads, yielding the
+        pictures as they are decoded::
+
+            for picture in Picture.from_files("vacation/*.jpg", workers=8):
+                ...
+
+        ``filenames`` is either a list of file names, or one name that may
+        contain the wildcards ``*``, ``?`` and ``[...]``, in which case the
+        matching files are read in sorted order. Names are looked up like
+        :py:meth:`from_file` does, and ``max_size`` works as it does there.
+
+        With ``ordered=True`` pictures are yielded in the order of the names,
+        otherwise in the order they finish decoding. At most ``max_in_flight``
+        pictures (by default twice ``workers``) are decoded but not yet
+        yielded at any time, which bounds the memory used.
+
+        :param filenames: a list of file names or a pattern
+        :param int workers: number of threads decoding files
+        :param bool ordered: yield pictures in the order of ``filenames``
+        :param int max_in_flight: most pictures decoded ahead of the caller
+        :param max_size: (width, height) the pictures must fit in
+        :return: an iterator over the pictures
+        :raises ValueError: if ``workers`` or ``max_in_flight`` is not positive
+        """
+        workers = _check_workers("Picture.from_files", workers)
+        max_in_flight = _check_workers("Picture.from_files",
+                                       2 * workers if max_in_flight is None else max_in_flight)
+        if isinstance(filenames, (str, os.PathLike)):
+            pattern = str(filenames)
+            if any(char in pattern for char in "*?["):
+                filenames = sorted(glob.glob(str(files.media_path(pattern))))
+            else:
+                filenames = [filenames]
+        return cls.__load_many(iter(filenames), workers, ordered, max_in_flight, max_size)
+
+    @classmethod
+    def __load_many(cls, filenames: typing.Iterator[typing.Union[str, os.PathLike]],
+                    workers: int, ordered: bool, max_in_flight: int,
+                    max_size: typing.Optional[typing.Tuple[int, int]]
+                    ) -> typing.Iterator['Picture']:
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        pending: typing.Deque[concurrent.futures.Future] = collections.deque()
+
+        def submit_next() -> None:
+            for filename in filenames:
+                pending.append(pool.submit(cls.from_file, filename, max_size=max_size))
+                return
+
+        try:
+            for _ in range(max_in_flight):
+                submit_next()
+            while pending:
+                if ordered:
+                    future = pending.popleft()
+                else:
+                    (done, _) = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    future = next(iter(done))
+                    pending.remove(future)
+                picture = future.result()
+                submit_next()
+                yield picture
+        finally:
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+
+    @classmethod
+    def __decode_to_memmap(cls, filename: typing.Union[str, os.PathLike],
+                           memmap: typing.Union[str, os.PathLike]) -> 'Picture':
+        with open(filename, "rb") as file:
+            size = _read_ppm_header(file)
+            if size is not None:
+                (width, height) = size
+                picture = cls.open_memmap(memmap, width, height)
+                for (top, bottom) in _stream_bands(height, width):
+                    data = file.read((bottom - top) * width * 3)
+                    if len(data) != (bottom - top) * width * 3:
+                        raise ValueError("In MediaComp.pictures.Picture.from_file: " +
+                                         f"PPM file {filename} is truncated")
+                    rows = numpy.frombuffer(data, dtype=numpy.uint8)
+                    picture._buffer[top:bottom, :, :3] = rows.reshape(bottom - top, width, 3)
+                return picture
         img = PIL.Image.open(filename)
         img.load()
-        return cls(img)
+        if img.mode not in ("RGB", "RGBX"):
+            img = img.convert(mode="RGB")
+        picture = cls.open_memmap(memmap, img.width, img.height)
+        for (top, bottom) in _stream_bands(img.height, img.width):
+            band = img.crop((0, top, img.width, bottom))
+            picture._buffer[top:bottom, :, :3] = numpy.asarray(band)[:, :, :3]
+        return picture
+
+    @classmethod
+    def open_memmap(cls, filename: typing.Union[str, os.PathLike],
+                    width: typing.Optional[int] = None,
+                    height: typing.Optional[int] = None) -> 'Picture':
+        """
+        Makes a picture whose pixels are kept in a ``.npy`` file that is mapped
+        into memory rather than in RAM, for pictures too big to fit in memory.
+        Pixels are read from the file when they are used and changes are
+        written back to it.
+
+        Operations that make a new picture (including :py:meth:`copy`) make it
+        in RAM, so use in-place operations (``inplace=True``), drawing and
+        views on such pictures.
+
+        With ``width`` and ``height`` a new black picture is created in the
+        file, otherwise the file must have been made by this method or by
+        :py:meth:`save`.
+
+        :param filename: name of the ``.npy`` file
+        :param int width:
+        :param int height:
+        :return:
+        :rtype: Picture
+        :raises ValueError: if the file does not hold a picture
+        :raises TypeError: if only one of ``width`` and ``height`` is given
+        """
+        if width is None and height is None:
+            array = numpy.lib.format.open_memmap(filename, mode="r+")
+            if array.dtype != numpy.uint8 or array.ndim != 3 or array.shape[2] != 4:
+                raise ValueError("In MediaComp.pictures.Picture.open_memmap: expected a " +
+                                 "height x width x 4 array of uint8, actually " +
+                                 f"{array.dtype} with shape {array.shape}")
+        else:
+            if width is None or height is None:
+                raise TypeError("In MediaComp.pictures.Picture.open_memmap: width and " +
+                                "height must be given together")
+            width = max(0, int(width))
+            height = max(0, int(height))
+            array = numpy.lib.format.open_memmap(filename, mode="w+", dtype=numpy.uint8,
+                                                 shape=(height, width, 4))
+            for (top, bottom) in _stream_bands(height, width):
+                array[top:bottom, :, 3] = 255
+        picture = cls(buffer=array)
+        # the file can be opened again, so writes must not go to a private copy
+        picture.__exposed = True
+        return picture
+
+    @classmethod
+    def from_array(cls, array: typing.Any) -> 'Picture':
+        """
+        Makes a picture from a height x width x 3 (or x 4) ``numpy`` array of
+        ``uint8`` values, indexed ``[y, x, channel]``.
+
+        The picture shares memory with ``array`` whenever the layout allows it:
+        a C-contiguous height x width x 4 array, or the array returned by
+        :py:meth:`as_array` of another picture. Any other array (including
+        read-only ones, other dtypes, or 2-D gray scale arrays) is copied
+        once, with values clamped to 0-255.
+
+        :param array: anything ``numpy.asarray`` accepts, including a Picture
+        :return:
+        :rtype: Picture
+        :raises ValueError: if ``array`` does not have a picture-like shape
+        """
+        array = numpy.asarray(array)
+        buffer: typing.Optional[numpy.ndarray] = _shared_buffer(array)
+        if buffer is None:
+            if array.ndim == 2:
+                array = array[:, :, numpy.newaxis]
+            if array.ndim != 3 or array.shape[2] not in (1, 3, 4):
+                raise ValueError("In MediaComp.pictures.Picture.from_array: expected a " +
+                                 f"height x width x 3 array, actually shape {array.shape}")
+            buffer = _new_buffer(array.shape[1], array.shape[0])
+            buffer[:, :, :3] = numpy.clip(array[:, :, :3], 0, 255)
+            return cls(buffer=buffer)
+        picture = cls(buffer=buffer)
+        picture.__exposed = True
+        return picture
 
     @classmethod
     def make_empty(cls, width: int, height: int,
@@ -674,19 +2034,91 @@ class Picture(PILImage, collections.abc.Iterable):
         width = int(width)
         if not isinstance(color, colors.BaseRGB):
             raise TypeError(type_error_message("setAllPixelsToAColor", "color", "Color", color))
-        return cls(PIL.Image.new("RGB", (width, height), color.rgb))
+        buffer = _new_buffer(width, height)
+        buffer[:, :, :3] = color.rgb
+        return cls(buffer=buffer)
 
-    def __str__(self) -> str:
-        return "<image> size:" + str(self.size)
+    def as_array(self) -> numpy.ndarray:
+        """
+        A writable height x width x 3 ``numpy`` array of ``uint8`` indexed
+        ``[y, x, channel]`` that shares memory with this picture, so
+        changes made through the array show up in the picture and vice versa.
 
-    def _repr_html_(self) -> str:
-        return '<img src="' + self.to_base64() + '" />'
+        Since the array can be changed at any time, a picture that has handed
+        one out is copied right away by :py:meth:`copy`, not on first change.
 
-    # TODO: fix it so it uses IPython display mechanism for PNG rather than HTML
-    # def _repr_png_(self):
-    #    pass
+        :return:
+        :rtype: numpy.ndarray
+        """
+        self._before_write()
+        self.__exposed = True
+        return self._buffer[:, :, :3]
 
-    def __getitem__(self, key: Point) -> Pixel:
+    @property
+    def __array_interface__(self) -> typing.Dict[str, typing.Any]:
+        """
+        lets ``numpy.asarray(picture)`` return the same view as :py:meth:`as_array`
+        """
+        return self.as_array().__array_interface__
+
+    def __str__(self) -> str:
+        return "<image> size:" + str(self.size)
+
+    def _repr_mimebundle_(self, include: typing.Any = None,
+                          exclude: typing.Any = None) -> typing.Dict[str, typing.Any]:
+        """
+        how IPython shows a picture: the encoded image as bytes, in the format
+        chosen with :py:func:`set_display_options`, and its ``str`` as text.
+        There are no ``_repr_png_`` or ``_repr_jpeg_`` methods, since IPython
+        would call them too and encode the picture more than once.
+        """
+        (mime, data) = self._render()
+        return {mime: data, "text/plain": str(self)}
+
+    def _render(self, **overrides: typing.Any) -> typing.Tuple[str, bytes]:
+        """
+        the (mime type, bytes) of the picture encoded as the display options,
+        changed by overrides, say, reused until the pixels change
+        """
+        self._run_pending()
+        options = dict(_DISPLAY_OPTIONS, **overrides)
+        version = (self.version, self.__checksum() if self.__exposed else None)
+        if self.__rendered_version != version:
+            self.__rendered = {}
+            self.__rendered_version = version
+        key = tuple(options.items())
+        if key not in self.__rendered:
+            self.__rendered[key] = _encode_for_display(self._pil_image, options)
+        return self.__rendered[key]
+
+    def __checksum(self) -> int:
+        if self._buffer.flags.c_contiguous:
+            return zlib.adler32(self._buffer)
+        checksum = 1
+        for row in self._buffer:
+            checksum = zlib.adler32(row, checksum)
+        return checksum
+
+    def __getitem__(self, key: typing.Union[Point, typing.Tuple[slice, slice]]
+                    ) -> typing.Union[Pixel, 'Picture']:
+        """
+        ``picture[x, y]`` is the :py:class:`Pixel` at ``(x, y)``, clamped to the
+        edges of the picture.
+
+        ``picture[left:right, top:bottom]`` is a view of that rectangle: a
+        picture that shares its pixels with this one, so anything done to the
+        view (changing pixels, drawing, ``copy_into`` it, in-place operations)
+        changes this picture too, and costs only as much as the rectangle. The
+        view's own coordinates start at ``(0, 0)`` in its top left corner.
+        Slices are clipped to the picture like Python slices of lists.
+
+        Pictures with views, and views themselves, are copied right away by
+        :py:meth:`copy` rather than on first change.
+
+        :raises ValueError: if a slice has a step other than 1
+        """
+        if isinstance(key[0], slice) and isinstance(key[1], slice):
+            return self.__view(key[0], key[1])
         index_x = int(key[0])
         index_y = int(key[1])
 
@@ -698,7 +2130,27 @@ class Picture(PILImage, collections.abc.Iterable):
             index_x = 0
         if index_y < 0:
             index_y = 0
-        return Pixel((index_x, index_y), self.__pixel_access)
+        return Pixel((index_x, index_y), self)
+
+    def __view(self, x_slice: slice, y_slice: slice) -> 'Picture':
+        (left, right, x_step) = x_slice.indices(self.width)
+        (top, bottom, y_step) = y_slice.indices(self.height)
+        if x_step != 1 or y_step != 1:
+            raise ValueError("In MediaComp.pictures.Picture.getitem: slices of a picture " +
+                             f"must have step 1, actually {x_step} and {y_step}")
+        # the view writes into this picture's buffer, so it must not be shared with copies
+        self._run_pending()
+        self._detach()
+        self.__exposed = True
+        view = Picture(buffer=self._buffer[top:max(top, bottom), left:max(left, right)])
+        view.__exposed = True
+        view.__parent = (self, left, top)
+        view.__sole = False
+        if self.__views is None:
+            self.__views = weakref.WeakSet()
+        self.__views.add(view)
+        self.__sole = False
+        return view
 
     def __setitem__(self, key: Point, value: colors.BaseRGB) -> None:
         index_x = int(key[0])  # pylint: disable=invalid-name
@@ -713,12 +2165,13 @@ class Picture(PILImage, collections.abc.Iterable):
         if not isinstance(value, colors.BaseRGB):
             raise TypeError(type_error_message("Picture.setitem", "value", "Color", value))
 
+        self._before_write((index_x, index_y, index_x + 1, index_y + 1))
         self.__pixel_access[index_x, index_y] = value.rgb
 
     def __iter__(self) -> typing.Iterator[Pixel]:
         for j in range(self.height):
             for i in range(self.width):
-                yield Pixel((i, j), self.__pixel_access)
+                yield Pixel((i, j), self)
 
     def to_base64(self) -> str:
         """
@@ -726,29 +2179,115 @@ class Picture(PILImage, collections.abc.Iterable):
 
         :return:
         """
-        file_like_backed_by_byte_buffer = io.BytesIO()
-        self._pil_image.save(file_like_backed_by_byte_buffer, format='PNG', optimize=True)
-        unencoded_byte_buffer = file_like_backed_by_byte_buffer.getvalue()
-        encoded_byte_buffer = base64.b64encode(unencoded_byte_buffer)
-        base64_string = str(encoded_byte_buffer)[2:-1]  # discard "b'" and beginning and "'" at end
-        return 'data:image/png;base64,' + base64_string
+        png_bytes = self._render(image_format="png", max_size=None)[1]
+        return 'data:image/png;base64,' + base64.b64encode(png_bytes).decode("ascii")
 
     # TODO test this
     def save(self, file_name: str) -> None:
         """
         save image to file
+
+        ``.npy`` files (see :py:meth:`open_memmap`) and binary PPM files
+        (``.ppm``) are written a band of rows at a time, so they can be used
+        for pictures that are too big to fit in memory.
+
         :param file_name: name of file to save
         """
-        self._pil_image.save(file_name)
+        self._run_pending()
+        suffix = pathlib.Path(file_name).suffix.lower()
+        if suffix == ".npy":
+            self.__save_npy(file_name)
+        elif suffix == ".ppm":
+            with open(file_name, "wb") as file:
+                file.write(f"P6\n{self.width} {self.height}\n255\n".encode("ascii"))
+                for (top, bottom) in _stream_bands(self.height, self.width):
+                    file.write(self._buffer[top:bottom, :, :3].tobytes())
+        else:
+            self._pil_image.convert(mode="RGB").save(file_name)
+
+    def __mapped_from(self, file_name: str) -> bool:
+        """ whether _buffer is mapped from the file file_name """
+        buffer_file = getattr(self._buffer, "filename", None)
+        try:
+            return buffer_file is not None and os.path.samefile(buffer_file, file_name)
+        except OSError:
+            return False
+
+    def __save_npy(self, file_name: str) -> None:
+        if self.__mapped_from(file_name):
+            if self.__parent is None and self._buffer.mode in ("r+", "w+"):
+                # the file already holds the pixels, up to the writes still in memory
+                self._buffer.flush()
+                return
+            # opening the file with mode="w+" would empty it while it is still mapped
+            # to the pixels being saved, so they are written to another file first
+            (handle, temporary) = tempfile.mkstemp(suffix=".npy",
+                                                   dir=os.path.dirname(os.path.abspath(file_name)))
+            os.close(handle)
+            try:
+                self.__write_npy(temporary)
+                os.replace(temporary, file_name)
+            except BaseException:
+                os.remove(temporary)
+                raise
+        else:
+            self.__write_npy(file_name)
+
+    def __write_npy(self, file_name: str) -> None:
+        array = numpy.lib.format.open_memmap(file_name, mode="w+", dtype=numpy.uint8,
+                                             shape=self._buffer.shape)
+        for (top, bottom) in _stream_bands(self.height, self.width):
+            array[top:bottom] = self._buffer[top:bottom]
+        array.flush()
+        del array
+
+    async def save_async(self, file_name: str) -> None:
+        """
+        A coroutine that saves the picture like :py:meth:`save` on the thread
+        pool of the :py:mod:`.files` module, so the event loop is not blocked.
+        The picture should not be changed until it is done.
+
+        :param file_name: name of file to save
+        """
+        await files.run_in_io_pool(self.save, file_name)
 
     def copy(self) -> 'Picture':
         """
         Makes a copy of the picture
 
+        The copy shares its pixels with this picture until either of them is
+        changed (through pixels, drawing, ``copy_into`` or an in-place
+        operation), which is when the one being changed gets its own pixels.
+        So copies that are only read cost almost nothing.
+
         :return: The copy
         :rtype: Picture
         """
-        return Picture(self._pil_image.copy())
+        self._run_pending()
+        if self.__exposed:
+            return Picture(buffer=self._buffer.copy())
+        copy = Picture(buffer=self._buffer)
+        copy.__sharers = self.__sharers
+        self.__sharers.add(copy)
+        (self.__sole, copy.__sole) = (False, False)
+        return copy
+
+    def pipeline(self) -> 'Pipeline':
+        """
+        Starts a :py:class:`Pipeline` that records ``map``, ``map_if``,
+        ``combine``, ``replace_if`` and ``map_channels`` calls on this picture
+        and runs them all in a single pass, without the intermediate copies
+        that calling the same methods one after another on pictures makes::
+
+            result = picture.pipeline().map(grayscale, mode="auto").map_if(is_dark, tint)
+
+        Nothing is computed until the result is displayed, saved, indexed or
+        asked for with :py:attr:`Pipeline.picture`.
+
+        :return:
+        :rtype: Pipeline
+        """
+        return Pipeline(self)
 
     def resize(self, height: int, width: int) -> 'Picture':
         """
@@ -760,18 +2299,17 @@ class Picture(PILImage, collections.abc.Iterable):
         """
         height = int(height)
         width = int(width)
+        self._run_pending()
         new_image = self._pil_image.resize((width, height))
         return Picture(new_image)
 
-    def map(self, transform: Transform, left_top: Point = (0, 0),
-            right_bottom: Point = (1000000, 1000000)) -> 'Picture':
+    def _clip_box(self, left_top: Point, right_bottom: Point) -> typing.Tuple[int, int, int, int]:
         """
-        Write better docstring
+        Orders the corners of a rectangle and clips it to the bounds of this picture
 
-        :param transform:
         :param Point left_top:
         :param Point right_bottom:
-        :return:
+        :return: (left, top, right, bottom) with right and bottom exclusive
         """
         left: int = int(left_top[0])
         top: int = int(left_top[1])
@@ -789,15 +2327,284 @@ class Picture(PILImage, collections.abc.Iterable):
             top = 0
         if bottom > self.height:
             bottom = self.height
-        copy = self.copy()
-        pixel_access: PixelAccess = copy.__pixel_access  # pylint: disable=protected-access
+        return left, top, right, bottom
+
+    def map(self, transform: typing.Union[Transform, ArrayTransform],
+            left_top: Point = (0, 0), right_bottom: Point = (1000000, 1000000),
+            mode: str = "pixel", workers: typing.Optional[int] = None,
+            inplace: bool = False) -> 'Picture':
+        """
+        Makes a copy of this picture with ``transform`` applied to every pixel
+        inside the rectangle from ``left_top`` to ``right_bottom``
+
+        With ``mode="pixel"`` (the default) the transform is called once per
+        pixel with a :py:class:`PixelInfo` and returns a :py:class:`~.colors.Color`.
+
+        With ``mode="auto"`` the transform is the same kind of function, but
+        it is first called once with symbolic pixel values to record the
+        arithmetic it does, which is then run on whole arrays of pixels.
+        Transforms that branch on pixel values, convert them with ``int()`` or
+        call functions that need real numbers can not be traced and are called
+        once per distinct color, or once per pixel, instead. Only use
+        ``"auto"`` (or ``"memo"``) for a transform whose result depends on
+        nothing but the pixel it is given: one that uses ``random``, counts
+        the pixels it has seen or reads a variable that changes while it runs
+        would give every pixel of the same color the same result.
+
+        With ``mode="lut"`` the transform must be separable: the new red
+        depends only on the old red, and likewise for green and blue (gamma,
+        negate, posterize, darken, ...). It is called for the 256 shades of
+        gray to build a lookup table per channel, which is then applied to
+        every pixel. ``"auto"`` never guesses that a transform is separable,
+        since a transform that treats a few rare colors differently (such as
+        red-eye removal) would look separable on every color but those.
+
+        With ``mode="memo"`` the transform is called once per distinct color
+        in the rectangle rather than once per pixel, which pays off for
+        posterized pictures, drawings and screenshots. If the rectangle has
+        more than ``MEMO_MAX_COLORS`` distinct colors, or the transform asks
+        for a pixel's ``x`` or ``y``, it falls back to calling the transform
+        per pixel. ``"auto"`` tries this when tracing fails.
+
+        With ``mode="vectorized"`` the transform is called once with the red,
+        green and blue channels of the rectangle as 2-D ``numpy`` arrays of
+        ``int32`` and returns a triple of red, green and blue arrays (or
+        scalars) of the same shape. Results are clamped to 0-255 and
+        truncated to integers, just like the arguments to ``Color``. When
+        :py:func:`set_threads` has asked for more than one thread, it is
+        called once per band of rows instead.
+
+        Whenever the transform ends up being called once per pixel, passing
+        ``workers`` greater than 1 splits the picture into bands of rows that
+        are handed to that many worker processes through shared memory. The
+        transform must then be picklable: a function defined with ``def`` at
+        the top level of a module, not a lambda.
+
+        :param transform:
+        :param Point left_top:
+        :param Point right_bottom:
+        :param str mode: ``"auto"``, ``"pixel"``, ``"lut"``, ``"memo"`` or ``"vectorized"``
+        :param int workers: number of processes for the per-pixel loop
+        :param bool inplace: change this picture instead of a copy
+        :return:
+        :raises ValueError: if ``mode`` is not recognized
+        :raises TypeError: if ``workers`` is more than 1 and ``transform`` can
+            not be pickled
+        """
+        _check_mode("Picture.map", mode, ("auto", "pixel", "lut", "memo", "vectorized"))
+        workers = _check_workers("Picture.map", workers)
+        box = self._clip_box(left_top, right_bottom)
+        (left, top, right, bottom) = box
+        target = self._target(inplace, box)
+        if mode == "vectorized":
+            array = target._rgb_view()
+
+            def run_band(band_top: int, band_bottom: int) -> None:
+                region = array[band_top:band_bottom, left:right]
+                _store_channels(region, transform(*_uint8_to_channels(region)))
+
+            if _THREADS > 1:
+                _for_each_band(top, bottom, right - left, run_band)
+            else:
+                run_band(top, bottom)
+            return target
+        if mode == "lut":
+            target._apply_tables(_gray_tables(transform)[0], box)
+            return target
+        if mode == "auto":
+            kernel = _Kernel.trace_color(transform)
+            if kernel is not None:
+                target._run_kernel(kernel, box, None,
+                                   lambda band_top, band_bottom:
+                                   target._map_pixels(transform, left, band_top,
+                                                      right, band_bottom))
+                return target
+        if mode in ("auto", "memo"):
+            try:
+                done = _map_distinct_colors(transform, target._rgb_view()[top:bottom, left:right])
+            except Exception:  # pylint: disable=broad-except
+                if mode == "memo":
+                    raise
+                done = False  # let the per-pixel loop raise the exception for the pixel causing it
+            if done:
+                return target
+        target._run_pixels("map", (transform,), None, box, workers)
+        return target
+
+    def map_channels(self, red: typing.Any = None, green: typing.Any = None,
+                     blue: typing.Any = None, left_top: Point = (0, 0),
+                     right_bottom: Point = (1000000, 1000000),
+                     inplace: bool = False) -> 'Picture':
+        """
+        Makes a copy of this picture with each channel of the pixels inside the
+        rectangle from ``left_top`` to ``right_bottom`` passed through a lookup
+        table. Each of ``red``, ``green`` and ``blue`` is either a function from
+        an ``int`` 0-255 to a new value, a sequence of 256 new values, or
+        ``None`` to leave that channel alone. Functions are called 256 times,
+        not once per pixel. New values are clamped to 0-255. With ``inplace=True``
+        this picture is changed and returned instead of a copy.
+
+        :param red:
+        :param green:
+        :param blue:
+        :param Point left_top:
+        :param Point right_bottom:
+        :param bool inplace: change this picture instead of a copy
+        :return:
+        :rtype: Picture
+        """
+        tables = _channel_tables("Picture.map_channels", (red, green, blue))
+        box = self._clip_box(left_top, right_bottom)
+        target = self._target(inplace, box)
+        target._apply_tables(tables, box)
+        return target
+
+    def _apply_tables(self, tables: typing.Sequence[typing.Optional[numpy.ndarray]],
+                      box: typing.Tuple[int, int, int, int]) -> None:
+        """ replaces each channel inside box by looking it up in its table, in place """
+        (left, top, right, bottom) = box
+        _for_each_band(top, bottom, right - left,
+                       lambda band_top, band_bottom:
+                       self._tables_band(tables, left, right, band_top, band_bottom))
+
+    def _tables_band(self, tables: typing.Sequence[typing.Optional[numpy.ndarray]],
+                     left: int, right: int, top: int, bottom: int) -> None:
+        """ looks up each channel of one band of the picture in its table, in place """
+        region = self._rgb_view()[top:bottom, left:right]
+        for index, table in enumerate(tables):
+            if table is not None:
+                region[:, :, index] = table[region[:, :, index]]
+
+    def _map_pixels(self, transform: Transform,
+                    left: int, top: int, right: int, bottom: int) -> None:
+        """ the per-pixel loop of map, working in place """
+        pixel_access: PixelAccess = self.__pixel_access
         for j in range(top, bottom):
             for i in range(left, right):
                 index: Point = (i, j)
                 pixel_info = PixelInfo(index, rgb=pixel_access[index])
                 color_out: colors.Color = transform(pixel_info)
                 pixel_access[index] = color_out.rgb
-        return copy
+
+    def _run_pixels(self, operation: str, functions: typing.Tuple[typing.Callable, ...],
+                    other: typing.Optional['Picture'], box: typing.Tuple[int, int, int, int],
+                    workers: int) -> None:
+        """
+        Runs the per-pixel loop of ``operation`` (``"map"``, ``"map_if"``,
+        ``"combine"`` or ``"replace_if"``) in place over the rectangle ``box``.
+
+        With more than one worker, this picture (and ``other``) are copied into
+        ``multiprocessing.shared_memory`` blocks, bands of rows are handed to a
+        ``ProcessPoolExecutor`` that runs the loop on the shared pixels, and the
+        result is copied back. Only the block names and the user's functions are
+        pickled, never the pixels, so the functions must be picklable: defined
+        at the top level of a module rather than lambdas or nested functions.
+        """
+        (left, top, right, bottom) = box
+        if workers <= 1 or bottom - top < 2:
+            self._pixel_loop(operation, functions, other, box)
+            return
+        try:
+            pickle.dumps(functions)
+        except Exception as error:
+            raise TypeError(f"In MediaComp.pictures.Picture.{operation}: with workers > 1 " +
+                            "the functions must be picklable, define them with def at the " +
+                            f"top level of a module instead of using lambda ({error})") from error
+        # imported here since it is only available in Python 3.8+
+        from multiprocessing import shared_memory  # pylint: disable=import-outside-toplevel
+        blocks = []
+        try:
+            arrays = []
+            for picture in (self, other):
+                if picture is None:
+                    continue
+                block = shared_memory.SharedMemory(create=True, size=max(1, picture._buffer.nbytes))
+                blocks.append(block)
+                shared = numpy.ndarray(picture._buffer.shape, numpy.uint8, buffer=block.buf)
+                shared[:, :, :] = picture._buffer
+                arrays.append(shared)
+            names = [(block.name, array.shape) for block, array in zip(blocks, arrays)]
+            rows = -(-(bottom - top) // (4 * workers))
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_pixel_loop_in_process, operation, functions, names,
+                                       (left, band_top, right, min(bottom, band_top + rows)))
+                           for band_top in range(top, bottom, rows)]
+                for future in futures:
+                    future.result()
+            self._buffer[:, :, :] = arrays[0]
+        finally:
+            arrays = []
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    def _pixel_loop(self, operation: str, functions: typing.Tuple[typing.Callable, ...],
+                    other: typing.Optional['Picture'],
+                    box: typing.Tuple[int, int, int, int]) -> None:
+        """ runs the per-pixel loop of operation in place over box """
+        (left, top, right, bottom) = box
+        if operation == "map":
+            self._map_pixels(functions[0], left, top, right, bottom)
+        elif operation == "map_if":
+            self._map_if_pixels(functions[0], functions[1], top, bottom)
+        elif operation == "combine":
+            self._combine_pixels(functions[0], other, top, bottom)
+        else:
+            self._replace_if_pixels(functions[0], other, top, bottom)
+
+    def _run_kernel(self, kernel: _Kernel, box: typing.Tuple[int, int, int, int],
+                    other: typing.Optional['Picture'],
+                    fallback: typing.Callable[[int, int], None]) -> None:
+        """
+        Evaluates a traced kernel in place, band by band, over the rectangle
+        ``box``. ``other`` is the second picture of combine and replace_if.
+        See :py:meth:`_kernel_band` for what the kernel's outputs mean and
+        what ``fallback`` is for.
+        """
+        (left, top, right, bottom) = box
+        _for_each_band(top, bottom, right - left,
+                       lambda band_top, band_bottom:
+                       self._kernel_band(kernel, other, left, right, band_top, band_bottom,
+                                         fallback))
+
+    def _kernel_band(self, kernel: _Kernel, other: typing.Optional['Picture'],
+                     left: int, right: int, top: int, bottom: int,
+                     fallback: typing.Callable[[int, int], None]) -> None:
+        """
+        Evaluates a traced kernel in place on one band of the picture.
+
+        The kernel's outputs are the red, green and blue of the result, optionally
+        preceded by a mask saying which pixels to change. Other pixels keep their
+        color, or get the color of ``other`` if the kernel has a mask and no colors.
+
+        If the kernel can not evaluate the band (for example because of a division
+        by zero) it is handed to ``fallback(top, bottom)`` instead, which calls the
+        user's functions per pixel so they behave exactly as before.
+        """
+        region = self._rgb_view()[top:bottom, left:right]
+        pixels = [region]
+        if other is not None:
+            pixels.append(other._rgb_view()[top:bottom, left:right])
+        try:
+            outputs = kernel.evaluate(pixels, left, top)
+            if len(outputs) % 3 == 1:
+                mask = numpy.broadcast_to(numpy.asarray(outputs.pop(0)).astype(bool),
+                                          region.shape[:2])
+                new_colors = region.copy() if outputs else pixels[1]
+            else:
+                mask = None
+                new_colors = numpy.empty_like(region)
+            if outputs:
+                _store_channels(new_colors, outputs)
+        except _KERNEL_ERRORS:
+            new_colors = None
+        if new_colors is None:
+            # outside the except clause, so the user's exceptions are not chained to ours
+            fallback(top, bottom)
+        elif mask is None:
+            region[:, :, :] = new_colors
+        else:
+            region[mask] = new_colors[mask]
 
     def remap(self, transform: Transform2, color: Color = Colors.black) -> 'Picture':
         """
@@ -809,6 +2616,7 @@ class Picture(PILImage, collections.abc.Iterable):
         """
         width = self.width
         height = self.height
+        self._run_pending()
         target = Picture.make_empty(width, height, color)
         target_pixel_access: PixelAccess = target.__pixel_access  # pylint: disable=protected-access
         self_pixel_access: PixelAccess = self.__pixel_access
@@ -821,72 +2629,392 @@ class Picture(PILImage, collections.abc.Iterable):
                 target_pixel_access[target_x % width, target_y % height] = Color.clamp(rgb_out)
         return target
 
-    def combine(self, pixel_combine: Combine, other: 'Picture', resize=False) -> 'Picture':
+    def combine(self, pixel_combine: Combine, other: 'Picture', resize=False,
+                mode: str = "pixel", workers: typing.Optional[int] = None,
+                inplace: bool = False) -> 'Picture':
         """
         Writie better docstring
 
+        ``mode`` works as it does for :py:meth:`map`: ``"auto"`` traces
+        ``pixel_combine`` into array operations when it can, ``"pixel"`` (the
+        default) always calls it once per pixel. ``workers`` and ``inplace``
+        work as they do for :py:meth:`map`.
+
         :param pixel_combine:
         :param Picture other:
         :param bool resize:
+        :param str mode: ``"auto"`` or ``"pixel"``
+        :param int workers: number of processes for the per-pixel loop
+        :param bool inplace: change this picture instead of a copy
         :return:
         :rtype: Picture
         """
-        copy = self.copy()
+        _check_mode("Picture.combine", mode, ("auto", "pixel"))
+        workers = _check_workers("Picture.combine", workers)
+        target = self._target(inplace)
         if resize:
-            if (not copy.height == other.height) or (not copy.width == other.width):
-                other = other.resize(copy.height, copy.width)
-        pixel_access: PixelAccess = copy.__pixel_access  # pylint: disable=protected-access
+            if (not target.height == other.height) or (not target.width == other.width):
+                other = other.resize(target.height, target.width)
+        other._run_pending()
+        kernel = None
+        if mode == "auto" and other.width >= target.width and other.height >= target.height:
+            kernel = _Kernel.trace_color(pixel_combine, 2)
+        if kernel is None:
+            target._run_pixels("combine", (pixel_combine,), other,
+                               (0, 0, target.width, target.height), workers)
+        else:
+            target._run_kernel(kernel, (0, 0, target.width, target.height), other,
+                               lambda band_top, band_bottom:
+                               target._combine_pixels(pixel_combine, other, band_top, band_bottom))
+        return target
+
+    def _combine_pixels(self, pixel_combine: Combine, other: 'Picture',
+                        top: int, bottom: int) -> None:
+        """ the per-pixel loop of combine, working in place """
+        pixel_access: PixelAccess = self.__pixel_access
         other_pixel_access: PixelAccess = other.__pixel_access  # pylint: disable=protected-access
-        for j in range(copy.height):
-            for i in range(copy.width):
+        for j in range(top, bottom):
+            for i in range(self.width):
                 index: Point = (i, j)
                 pixel_info = PixelInfo(index, rgb=pixel_access[index])
                 other_pixel_info = PixelInfo(index, rgb=other_pixel_access[index])
                 color_out: colors.Color = pixel_combine(pixel_info, other_pixel_info)
                 pixel_access[index] = color_out.rgb
-        return copy
 
-    def map_if(self, predicate: Predicate, transform: Transform) -> 'Picture':
+    def map_if(self, predicate: Predicate, transform: Transform,
+               mode: str = "pixel", workers: typing.Optional[int] = None,
+               inplace: bool = False) -> 'Picture':
         """
         Write better docstring
 
+        ``mode`` works as it does for :py:meth:`map`: ``"auto"`` traces
+        ``predicate`` and ``transform`` into array operations when it can,
+        ``"pixel"`` (the default) always calls them once per pixel. ``workers``
+        and ``inplace`` work as they do for :py:meth:`map`.
+
         :param predicate:
         :param transform:
+        :param str mode: ``"auto"`` or ``"pixel"``
+        :param int workers: number of processes for the per-pixel loop
+        :param bool inplace: change this picture instead of a copy
         :return:
         :rtype: Picture
         """
-        copy = self.copy()
-        pixel_access: PixelAccess = copy.__pixel_access  # pylint: disable=protected-access
-        for j in range(copy.height):
-            for i in range(copy.width):
+        _check_mode("Picture.map_if", mode, ("auto", "pixel"))
+        workers = _check_workers("Picture.map_if", workers)
+        target = self._target(inplace)
+        kernel = None
+        if mode == "auto":
+            condition = _Kernel.trace_predicate(predicate)
+            if condition is not None:
+                new_color = _Kernel.trace_color(transform)
+                if new_color is not None:
+                    kernel = condition + new_color
+        if kernel is None:
+            target._run_pixels("map_if", (predicate, transform), None,
+                               (0, 0, target.width, target.height), workers)
+        else:
+            target._run_kernel(kernel, (0, 0, target.width, target.height), None,
+                               lambda band_top, band_bottom:
+                               target._map_if_pixels(predicate, transform, band_top, band_bottom))
+        return target
+
+    def _map_if_pixels(self, predicate: Predicate, transform: Transform,
+                       top: int, bottom: int) -> None:
+        """ the per-pixel loop of map_if, working in place """
+        pixel_access: PixelAccess = self.__pixel_access
+        for j in range(top, bottom):
+            for i in range(self.width):
                 index: Point = (i, j)
                 pixel_info = PixelInfo(index, rgb=pixel_access[index])
                 if predicate(pixel_info):
                     color_out: colors.Color = transform(pixel_info)
                     pixel_access[index] = color_out.rgb
-        return copy
 
     def replace_if(self, predicate: Predicate, other: 'Picture',
-                   resize=False) -> 'Picture':
+                   resize=False, mode: str = "pixel",
+                   workers: typing.Optional[int] = None, inplace: bool = False) -> 'Picture':
         """
         Write better docstring
 
+        ``mode`` works as it does for :py:meth:`map`: ``"auto"`` traces
+        ``predicate`` into array operations when it can, ``"pixel"`` (the
+        default) always calls it once per pixel. ``workers`` and ``inplace``
+        work as they do for :py:meth:`map`.
+
         :param predicate:
         :param other:
         :param bool resize:
+        :param str mode: ``"auto"`` or ``"pixel"``
+        :param int workers: number of processes for the per-pixel loop
+        :param bool inplace: change this picture instead of a copy
         :return:
         :rtype: Picture
         """
-        copy = self.copy()
+        _check_mode("Picture.replace_if", mode, ("auto", "pixel"))
+        workers = _check_workers("Picture.replace_if", workers)
+        target = self._target(inplace)
         if resize:
-            if (not copy.height == other.height) or (not copy.width == other.width):
-                other = other.resize(copy.height, copy.width)
-        pixel_access: PixelAccess = copy.__pixel_access  # pylint: disable=protected-access
+            if (not target.height == other.height) or (not target.width == other.width):
+                other = other.resize(target.height, target.width)
+        other._run_pending()
+        kernel = None
+        if mode == "auto" and other.width >= target.width and other.height >= target.height:
+            kernel = _Kernel.trace_predicate(predicate)
+        if kernel is None:
+            target._run_pixels("replace_if", (predicate,), other,
+                               (0, 0, target.width, target.height), workers)
+        else:
+            target._run_kernel(kernel, (0, 0, target.width, target.height), other,
+                               lambda band_top, band_bottom:
+                               target._replace_if_pixels(predicate, other, band_top, band_bottom))
+        return target
+
+    def _replace_if_pixels(self, predicate: Predicate, other: 'Picture',
+                           top: int, bottom: int) -> None:
+        """ the per-pixel loop of replace_if, working in place """
+        pixel_access: PixelAccess = self.__pixel_access
         other_pixel_access: PixelAccess = other.__pixel_access  # pylint: disable=protected-access
-        for j in range(copy.height):
-            for i in range(copy.width):
+        for j in range(top, bottom):
+            for i in range(self.width):
                 index: Point = (i, j)
                 pixel_info = PixelInfo(index, rgb=pixel_access[index])
                 if predicate(pixel_info):
                     pixel_access[index] = other_pixel_access[index]
-        return copy
+
+
+class _Step:
+    """
+    One operation recorded by a Pipeline, and how it will be run: as a traced
+    kernel (only in ``"auto"`` mode), as the lookup tables of map_channels, or
+    by calling the user's functions per pixel
+    """
+
+    def __init__(self, operation: str, functions: typing.Tuple[typing.Callable, ...],
+                 other: typing.Optional[Picture], box: typing.Tuple[int, int, int, int],
+                 tables: typing.Optional[typing.List[typing.Optional[numpy.ndarray]]] = None,
+                 mode: str = "pixel"):
+        self.operation = operation
+        self.functions = functions
+        self.other = other
+        self.box = box
+        self.tables = tables
+        self.mode = mode
+        self.kernel: typing.Optional[_Kernel] = None
+
+    def prepare(self) -> None:
+        """ traces the functions in ``"auto"`` mode """
+        if self.tables is not None or self.mode != "auto":
+            return
+        if self.operation == "map_if":
+            condition = _Kernel.trace_predicate(self.functions[0])
+            new_color = None if condition is None else _Kernel.trace_color(self.functions[1])
+            self.kernel = None if new_color is None else condition + new_color
+        elif self.operation == "replace_if":
+            self.kernel = _Kernel.trace_predicate(self.functions[0])
+        else:
+            self.kernel = _Kernel.trace_color(self.functions[0],
+                                              1 if self.operation == "map" else 2)
+
+    def run(self, picture: Picture, top: int, bottom: int) -> None:
+        """ runs the step in place on the rows top to bottom of picture """
+        (left, box_top, right, box_bottom) = self.box
+        top = max(top, box_top)
+        bottom = min(bottom, box_bottom)
+        if top >= bottom or left >= right:
+            return
+        # pylint: disable=protected-access
+        if self.tables is not None:
+            picture._tables_band(self.tables, left, right, top, bottom)
+        elif self.kernel is not None:
+            picture._kernel_band(self.kernel, self.other, left, right, top, bottom,
+                                 lambda band_top, band_bottom:
+                                 picture._pixel_loop(self.operation, self.functions, self.other,
+                                                     (left, band_top, right, band_bottom)))
+        else:
+            picture._pixel_loop(self.operation, self.functions, self.other,
+                                (left, top, right, bottom))
+
+
+class Pipeline:
+    """
+    A chain of picture operations recorded by :py:meth:`Picture.pipeline`.
+
+    The methods of this class take the same arguments as the ``Picture``
+    methods with the same names and return the pipeline, so calls can be
+    chained. When the result is needed, the source picture is copied and every
+    operation is applied to one cache-sized band of rows before moving on to the
+    next band, so no intermediate pictures are made. Operations recorded with
+    ``mode="auto"`` are traced into array operations like ``Picture.map`` does
+    in that mode, the others call their functions once per pixel.
+
+    The source picture (and any other pictures passed to ``combine`` and
+    ``replace_if``) are read when the result is computed, not when the
+    operations are recorded.
+    """
+
+    def __init__(self, source: Picture):
+        if not isinstance(source, Picture):
+            raise TypeError(type_error_message("Pipeline", "source", "Picture", source))
+        self.__source: Picture = source
+        self.__steps: typing.List[_Step] = []
+        self.__result: typing.Optional[Picture] = None
+
+    def __str__(self) -> str:
+        return f"<pipeline> {len(self.__steps)} operations on {self.__source}"
+
+    def __add_step(self, step: _Step) -> 'Pipeline':
+        self.__steps.append(step)
+        self.__result = None
+        return self
+
+    def __full_box(self) -> typing.Tuple[int, int, int, int]:
+        return 0, 0, self.__source.width, self.__source.height
+
+    def __other(self, other: Picture, resize: bool) -> Picture:
+        if not isinstance(other, Picture):
+            raise TypeError(type_error_message("Pipeline", "other", "Picture", other))
+        source = self.__source
+        if resize and (other.height != source.height or other.width != source.width):
+            return other.resize(source.height, source.width)
+        if other.height < source.height or other.width < source.width:
+            raise ValueError("In MediaComp.pictures.Pipeline: other picture is smaller " +
+                             "than the source picture, use resize=True")
+        return other
+
+    def map(self, transform: Transform, left_top: Point = (0, 0),
+            right_bottom: Point = (1000000, 1000000), mode: str = "pixel") -> 'Pipeline':
+        """
+        records :py:meth:`Picture.map`
+
+        :param str mode: ``"auto"`` or ``"pixel"``
+        :return: this pipeline
+        :rtype: Pipeline
+        :raises ValueError: if ``mode`` is not recognized
+        """
+        _check_mode("Pipeline.map", mode, ("auto", "pixel"))
+        return self.__add_step(_Step("map", (transform,), None,
+                                     self.__source._clip_box(left_top, right_bottom),
+                                     mode=mode))
+
+    def map_if(self, predicate: Predicate, transform: Transform,
+               mode: str = "pixel") -> 'Pipeline':
+        """
+        records :py:meth:`Picture.map_if`
+
+        :param str mode: ``"auto"`` or ``"pixel"``
+        :return: this pipeline
+        :rtype: Pipeline
+        :raises ValueError: if ``mode`` is not recognized
+        """
+        _check_mode("Pipeline.map_if", mode, ("auto", "pixel"))
+        return self.__add_step(_Step("map_if", (predicate, transform), None, self.__full_box(),
+                                     mode=mode))
+
+    def combine(self, pixel_combine: Combine, other: Picture, resize=False,
+                mode: str = "pixel") -> 'Pipeline':
+        """
+        records :py:meth:`Picture.combine`
+
+        :param str mode: ``"auto"`` or ``"pixel"``
+        :return: this pipeline
+        :rtype: Pipeline
+        :raises ValueError: if ``mode`` is not recognized
+        """
+        _check_mode("Pipeline.combine", mode, ("auto", "pixel"))
+        return self.__add_step(_Step("combine", (pixel_combine,), self.__other(other, resize),
+                                     self.__full_box(), mode=mode))
+
+    def replace_if(self, predicate: Predicate, other: Picture, resize=False,
+                   mode: str = "pixel") -> 'Pipeline':
+        """
+        records :py:meth:`Picture.replace_if`
+
+        :param str mode: ``"auto"`` or ``"pixel"``
+        :return: this pipeline
+        :rtype: Pipeline
+        :raises ValueError: if ``mode`` is not recognized
+        """
+        _check_mode("Pipeline.replace_if", mode, ("auto", "pixel"))
+        return self.__add_step(_Step("replace_if", (predicate,), self.__other(other, resize),
+                                     self.__full_box(), mode=mode))
+
+    def map_channels(self, red: typing.Any = None, green: typing.Any = None,
+                     blue: typing.Any = None, left_top: Point = (0, 0),
+                     right_bottom: Point = (1000000, 1000000)) -> 'Pipeline':
+        """
+        records :py:meth:`Picture.map_channels`
+
+        :return: this pipeline
+        :rtype: Pipeline
+        """
+        tables = _channel_tables("Pipeline.map_channels", (red, green, blue))
+        return self.__add_step(_Step("map", (), None,
+                                     self.__source._clip_box(left_top, right_bottom), tables))
+
+    @property
+    def picture(self) -> Picture:
+        """
+        the result of running the recorded operations, computed the first time
+        it is asked for (and again if more operations are recorded)
+
+        :type: Picture
+        """
+        if self.__result is None:
+            self.__result = self.__run()
+        return self.__result
+
+    def __run(self) -> Picture:
+        source = self.__source
+        result = Picture(buffer=_new_buffer(source.width, source.height))
+        steps = list(self.__steps)
+        for step in steps:
+            step.prepare()
+            if step.other is not None:
+                step.other._run_pending()  # pylint: disable=protected-access
+        source_array = source._rgb_view()  # pylint: disable=protected-access
+        result_array = result._rgb_view()  # pylint: disable=protected-access
+
+        def run_band(top: int, bottom: int) -> None:
+            result_array[top:bottom] = source_array[top:bottom]
+            for step in steps:
+                step.run(result, top, bottom)
+
+        # the user's functions of a step run per pixel may keep state, so they
+        # are called one pixel after another, as map and its siblings call them
+        in_order = any(step.kernel is None and step.tables is None for step in steps)
+        _for_each_band(0, source.height, source.width, run_band, in_order)
+        return result
+
+    @property
+    def width(self) -> int:
+        """
+        width of the result in pixels
+
+        :type: int
+        """
+        return self.__source.width
+
+    @property
+    def height(self) -> int:
+        """
+        height of the result in pixels
+
+        :type: int
+        """
+        return self.__source.height
+
+    def __getitem__(self, key: Point) -> Pixel:
+        return self.picture[key]
+
+    def _repr_mimebundle_(self, include: typing.Any = None,
+                          exclude: typing.Any = None) -> typing.Dict[str, typing.Any]:
+        return self.picture._repr_mimebundle_(include, exclude)  # pylint: disable=protected-access
+
+    def save(self, file_name: str) -> None:
+        """
+        computes the result and saves it to a file
+
+        :param file_name: name of file to save
+        """
+        self.picture.save(file_name)
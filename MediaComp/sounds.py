@@ -53,12 +53,28 @@ class Sound(collections.abc.Iterable):
         """
         Write better docstring
 
+        Decoded files are kept in the cache of the :py:mod:`.files` module, so
+        reading the same unchanged file again shares the cached samples, which
+        are only copied when the sound is changed.
+
         :param file_name:
         :return:
         """
         path = files.media_path(str(file_name))
-        rate, data = wavfile.read(path)
-        return cls(numpy.copy(data), rate)
+        rate, data = files.load_cached("sound", path, _read_wav, lambda wav: wav[1].nbytes)
+        return cls(data, rate)
+
+    @classmethod
+    async def load_async(cls, file_name: typing.Union[str, os.PathLike]) -> 'Sound':
+        """
+        A coroutine that reads a sound file like :py:meth:`from_file` on the
+        thread pool of the :py:mod:`.files` module, so the event loop is not blocked.
+
+        :param file_name:
+        :return:
+        :rtype: Sound
+        """
+        return await files.run_in_io_pool(cls.from_file, file_name)
 
     @classmethod
     def make_empty(cls, num_samples: int, rate: float = 22500.0) -> 'Sound':
@@ -166,6 +182,9 @@ class Sound(collections.abc.Iterable):
             raise IndexError(f'Sound.setitem({index}), Index too large, max={self.__samples}')
 
         value = numpy.int16(Sound.clamp(value))
+        if not self.__samples.flags.writeable:
+            # shared with the decode cache, see from_file
+            self.__samples = numpy.copy(self.__samples)
         self.__samples[index] = value
 
     def _repr_html_(self) -> str:
@@ -184,6 +203,23 @@ class Sound(collections.abc.Iterable):
         file_path = files.media_path(file_name)
         wavfile.write(str(file_path), int(self.rate), self.__samples)
 
+    async def write_async(self, file_name: str) -> None:
+        """
+        A coroutine that writes the sound like :py:meth:`write` on the thread
+        pool of the :py:mod:`.files` module, so the event loop is not blocked.
+
+        :param file_name:
+        """
+        await files.run_in_io_pool(self.write, file_name)
+
+
+def _read_wav(path) -> typing.Tuple[int, numpy.array]:
+    """ reads a WAV file for Sound.from_file and the decode cache, with read-only samples """
+    rate, data = wavfile.read(path)
+    data = numpy.copy(data)
+    data.flags.writeable = False
+    return rate, data
+
 
 class Sample:
     """
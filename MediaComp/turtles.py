@@ -22,6 +22,11 @@ import math
 
 import collections.abc
 
+# modules io and os are standard in Python 3
+# used to save a Recording to a file or to bytes to show in a notebook
+import io
+import os
+
 # module typing is standard in Python 3.5+:
 #           https://docs.python.org/3/library/typing.html
 # used for type hints used in static type checking in PEP 484
@@ -35,6 +40,11 @@ import collections.abc
 # checking or casting/conversion still needs to be done
 import typing
 
+# suppress mypy "error: No library stub file for module 'numpy'"
+# used to keep the turtles' positions and headings and the line segments
+# they have drawn but not yet rasterized in arrays
+import numpy  # type: ignore
+
 from . import pictures
 
 
@@ -49,22 +59,24 @@ class Turtle:
     """
     Use ``addTurtle`` method from class ``World`` to create
     new ``Turtle`` instances
+
+    A ``Turtle`` keeps its position, heading and pen in the arrays of its
+    ``World`` (see :py:attr:`World.x_positions`), so :py:meth:`World.step`
+    can move all of the turtles at once.
     """
     def __init__(self, world: 'World', x_start: float = 0.0, y_start: float = 0.0,
                  heading: float = 0.0):
         if not isinstance(world, World):
             raise TypeError(type_error_message("__init__", "world",
                                                "World", world))
-        self.__x: float = float(x_start)
-        self.__y: float = float(y_start)
-        self.__pen_up: bool = False
-        self.__heading: float = float(heading)
         self.__world: 'World' = world
+        # pylint: disable=protected-access
+        (self.__arrays, self.__index) = world._add_turtle(self, x_start, y_start, heading)
 
     def __str__(self) -> str:
-        return f"Turtle: at x={self.__x}, y={self.__y}, " +\
-               f"heading: {self.__heading} degrees, " +\
-               "pen: " + ('up' if self.__pen_up else 'down')
+        return f"Turtle: at x={self.x}, y={self.y}, " +\
+               f"heading: {self.heading} degrees, " +\
+               "pen: " + ('up' if self.pen_up else 'down')
 
     @property
     def x(self) -> float:  # pylint: disable=invalid-name
@@ -73,7 +85,7 @@ class Turtle:
 
         :type: float
         """
-        return self.__x
+        return float(self.__arrays.x[self.__index])
 
     @property
     def y(self) -> float:  # pylint: disable=invalid-name
@@ -82,7 +94,7 @@ class Turtle:
 
         :type: float
         """
-        return self.__y
+        return float(self.__arrays.y[self.__index])
 
     @property
     def pen_up(self) -> bool:
@@ -95,14 +107,11 @@ class Turtle:
 
         :type: bool
         """
-        return self.__pen_up
+        return bool(self.__arrays.pen_up[self.__index])
 
     @pen_up.setter
     def pen_up(self, flag: bool) -> None:
-        if bool(flag):
-            self.pen_up = True
-        else:
-            self.pen_up = False
+        self.__arrays.pen_up[self.__index] = bool(flag)
 
     @property
     def heading(self) -> float:
@@ -112,12 +121,12 @@ class Turtle:
 
         :type: float
         """
-        return self.__heading
+        return float(self.__arrays.heading[self.__index])
 
     @heading.setter
     def heading(self, degrees: float) -> None:
         degrees = float(degrees) % 360.0
-        self.__heading = degrees
+        self.__arrays.heading[self.__index] = degrees
 
     def forward(self, distance: float) -> None:
         """
@@ -127,10 +136,10 @@ class Turtle:
         :param float distance: How many pixel units to move forward
         """
         distance = float(distance)
-        radians = math.radians(self.__heading)
+        radians = math.radians(self.heading)
         delta_x = math.sin(radians) * distance
         delta_y = math.cos(radians) * distance
-        self.move_to(self.__x + delta_x, self.__y + delta_y)
+        self.move_to(self.x + delta_x, self.y + delta_y)
 
     def turn(self, degrees: float) -> None:
         """
@@ -147,8 +156,8 @@ class Turtle:
         :param float degrees: number of degrees to turn counterclockwise
         """
         degrees = float(degrees)
-        new_heading = (self.__heading + degrees) % 360.0
-        self.__heading = new_heading
+        new_heading = (self.heading + degrees) % 360.0
+        self.__arrays.heading[self.__index] = new_heading
 
     def move_to(self, x_position: float, y_position: float) -> None:
         """
@@ -162,11 +171,19 @@ class Turtle:
         """
         x_position = float(x_position)
         y_position = float(y_position)
-        if not self.__pen_up:
-            self.__world.picture.add_line(int(self.__x), int(self.__y),
-                                          int(x_position), int(y_position))
-        self.__x = x_position
-        self.__y = y_position
+        if not self.pen_up:
+            # pylint: disable=protected-access
+            self.__world._add_segment(self.x, self.y, x_position, y_position)
+        self.__arrays.x[self.__index] = x_position
+        self.__arrays.y[self.__index] = y_position
+        self.__arrays.moved = True
+
+    def _place(self, x_position: float, y_position: float, heading: float) -> None:
+        """ moves and turns the turtle without drawing, see :py:meth:`World.run_program` """
+        self.__arrays.x[self.__index] = float(x_position)
+        self.__arrays.y[self.__index] = float(y_position)
+        self.__arrays.heading[self.__index] = float(heading) % 360.0
+        self.__arrays.moved = True
 
     def turn_to_face(self, x_position: float, y_position: float) -> None:
         """
@@ -178,16 +195,281 @@ class Turtle:
         :param float x_position: x coordinate of the location to turn towards
         :param float y_position: y coordinate of the location to turn towards
         """
-        delta_x = self.__x - float(x_position)
-        delta_y = self.__y - float(y_position)
+        delta_x = self.x - float(x_position)
+        delta_y = self.y - float(y_position)
         radians = math.atan2(delta_x, delta_y)
         degrees = math.degrees(radians)
-        self.__heading = degrees
+        self.__arrays.heading[self.__index] = degrees
+
+
+class _TurtleArrays:  # pylint: disable=too-few-public-methods
+    """
+    The positions, headings and pens of all of the turtles in a ``World``,
+    element i of each array belonging to turtle i. The arrays are replaced by
+    bigger ones as turtles are added, so they are always looked up here.
+    """
+
+    def __init__(self, capacity: int = 16):
+        self.x: numpy.ndarray = numpy.zeros(capacity)  # pylint: disable=invalid-name
+        self.y: numpy.ndarray = numpy.zeros(capacity)  # pylint: disable=invalid-name
+        self.heading: numpy.ndarray = numpy.zeros(capacity)
+        self.pen_up: numpy.ndarray = numpy.zeros(capacity, dtype=bool)
+        self.count: int = 0
+        # whether a turtle may have moved since the grid was last updated
+        self.moved: bool = True
+
+    def add(self, x_position: float, y_position: float, heading: float) -> int:
+        """ makes room for one more turtle with its pen down and returns its index """
+        if self.count == len(self.x):
+            capacity = 2 * len(self.x)
+            for name in ("x", "y", "heading", "pen_up"):
+                old = getattr(self, name)
+                array = numpy.zeros(capacity, dtype=old.dtype)
+                array[:self.count] = old[:self.count]
+                setattr(self, name, array)
+        index = self.count
+        self.x[index] = float(x_position)
+        self.y[index] = float(y_position)
+        self.heading[index] = float(heading)
+        self.pen_up[index] = False
+        self.count += 1
+        self.moved = True
+        return index
+
+
+class _Segments:
+    """
+    A growable array of line segments, one (start_x, start_y, end_x, end_y)
+    row per segment, kept in the order they were drawn
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.__array: numpy.ndarray = numpy.empty((capacity, 4), dtype=float)
+        self.__count: int = 0
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __reserve(self, extra: int) -> None:
+        needed = self.__count + extra
+        if needed > len(self.__array):
+            capacity = max(needed, 2 * len(self.__array))
+            array = numpy.empty((capacity, 4), dtype=float)
+            array[:self.__count] = self.__array[:self.__count]
+            self.__array = array
+
+    def append(self, start_x: float, start_y: float, end_x: float, end_y: float) -> None:
+        """ adds one segment """
+        self.__reserve(1)
+        self.__array[self.__count] = (start_x, start_y, end_x, end_y)
+        self.__count += 1
+
+    def extend(self, segments: numpy.ndarray) -> None:
+        """ adds the rows of an n x 4 array of segments """
+        self.__reserve(len(segments))
+        self.__array[self.__count:self.__count + len(segments)] = segments
+        self.__count += len(segments)
+
+    def rows(self, start: int, stop: int) -> numpy.ndarray:
+        """ the segments from start up to stop, valid until the next segment is added """
+        return self.__array[start:stop]
+
+    def take(self) -> numpy.ndarray:
+        """ returns the segments added so far and empties the buffer """
+        segments = self.__array[:self.__count].copy()
+        self.__count = 0
+        return segments
+
+
+def _draw_segments(picture: pictures.Picture, segments: numpy.ndarray) -> None:
+    """ draws segments in black like ``add_line`` would one by one """
+    if len(segments) > 0:
+        with picture.drawing() as draw:
+            draw.lines(segments)
+
+
+def _expand(program: str, rules: typing.Optional[typing.Mapping[str, str]],
+            iterations: int) -> numpy.ndarray:
+    """
+    rewrites every character of program that has a rule iterations times,
+    returns the result as an array of character codes
+    """
+    codes = numpy.frombuffer(program.encode("ascii", "replace"), dtype=numpy.uint8)
+    if rules is None or iterations <= 0:
+        return codes
+    replacements = [bytes([code]) for code in range(256)]
+    for (symbol, replacement) in rules.items():
+        if not isinstance(symbol, str) or len(symbol) != 1 or ord(symbol) > 127:
+            raise ValueError("In MediaComp.turtles.World.run_program: rules must rewrite single " +
+                             f"ASCII characters, actually {symbol!r}")
+        if not isinstance(replacement, str):
+            raise TypeError(type_error_message("World.run_program", "rules", "str",
+                                               replacement))
+        replacements[ord(symbol)] = replacement.encode("ascii", "replace")
+    table = numpy.frombuffer(b"".join(replacements), dtype=numpy.uint8)
+    lengths = numpy.array([len(replacement) for replacement in replacements])
+    starts = numpy.cumsum(lengths) - lengths
+    for _ in range(iterations):
+        counts = lengths[codes]
+        ends = numpy.cumsum(counts)
+        total = int(ends[-1]) if len(ends) > 0 else 0
+        # how far each output character is into the replacement it comes from
+        offsets = numpy.arange(total) - numpy.repeat(ends - counts, counts)
+        codes = table[numpy.repeat(starts[codes], counts) + offsets]
+    return codes
+
+
+def _match_brackets(codes: numpy.ndarray
+                    ) -> typing.Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    finds each '[' and its matching ']' in a program,
+    returns the positions of the opening and closing brackets and how deeply each pair is nested
+    """
+    is_open = codes == ord("[")
+    is_close = codes == ord("]")
+    depth = numpy.cumsum(is_open.astype(int) - is_close)
+    if len(depth) > 0 and (depth.min() < 0 or depth[-1] != 0):
+        raise ValueError("In MediaComp.turtles.World.run_program: unbalanced [ and ] in program")
+    brackets = numpy.flatnonzero(is_open | is_close)
+    levels = depth[brackets] + is_close[brackets]
+    # among the brackets nested equally deep, each '[' is followed by its own ']'
+    order = numpy.lexsort((brackets, levels))
+    pairs = brackets[order].reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1], levels[order][::2]
+
+
+def _close_brackets(deltas: numpy.ndarray, opens: numpy.ndarray, closes: numpy.ndarray,
+                    levels: numpy.ndarray) -> None:
+    """
+    sets the delta at each ']' to undo the deltas since its '[', innermost pairs first,
+    so a cumulative sum of deltas goes back to where it was at the '['
+    """
+    for level in range(int(levels.max(initial=0)), 0, -1):
+        pick = levels == level
+        sums = numpy.cumsum(deltas, axis=0)
+        deltas[closes[pick]] = sums[opens[pick]] - sums[closes[pick] - 1]
+
+
+class _Grid:
+    """
+    A uniform grid of square cells over a world for finding turtles by
+    position. The turtles are kept sorted by the cell they are in, so the
+    turtles in a row of neighboring cells are next to each other. Turtles
+    outside the world count as being in the nearest cell along its edge.
+    """
+
+    def __init__(self, width: int, height: int, cell_size: float):
+        self.cell_size: float = float(cell_size)
+        self.columns: int = max(1, math.ceil(width / self.cell_size))
+        self.rows: int = max(1, math.ceil(height / self.cell_size))
+        # the cell of each turtle, by turtle index, when last updated
+        self.keys: numpy.ndarray = numpy.zeros(0, dtype=int)
+        # the turtle indices sorted by cell, and their cells
+        self.order: numpy.ndarray = numpy.zeros(0, dtype=int)
+        self.sorted_keys: numpy.ndarray = numpy.zeros(0, dtype=int)
+
+    def cells(self, x_positions: typing.Any,
+              y_positions: typing.Any) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+        """ the column and row of the cells that positions are in """
+        column = numpy.clip(numpy.floor_divide(x_positions, self.cell_size), 0, self.columns - 1)
+        row = numpy.clip(numpy.floor_divide(y_positions, self.cell_size), 0, self.rows - 1)
+        return column.astype(int), row.astype(int)
+
+    def update(self, turtles: _TurtleArrays) -> None:
+        """ sorts the turtles by cell again, if any have moved to another cell """
+        if not turtles.moved:
+            return
+        turtles.moved = False
+        (column, row) = self.cells(turtles.x[:turtles.count], turtles.y[:turtles.count])
+        keys = row * self.columns + column
+        old = len(self.keys)
+        if len(keys) == old and numpy.array_equal(keys, self.keys):
+            return
+        order = numpy.concatenate((self.order, numpy.arange(old, len(keys))))
+        # only the turtles that changed cells are out of place, and a stable
+        # sort of an almost sorted array is quick
+        order = order[numpy.argsort(keys[order], kind="stable")]
+        (self.keys, self.order, self.sorted_keys) = (keys, order, keys[order])
+
+    def near(self, x_position: float, y_position: float, reach: float) -> numpy.ndarray:
+        """ the turtles in the cells within reach of a position, in no particular order """
+        (columns, rows) = self.cells([x_position - reach, x_position + reach],
+                                     [y_position - reach, y_position + reach])
+        firsts = numpy.arange(rows[0], rows[1] + 1) * self.columns
+        starts = numpy.searchsorted(self.sorted_keys, firsts + columns[0], side="left")
+        stops = numpy.searchsorted(self.sorted_keys, firsts + columns[1], side="right")
+        return numpy.concatenate([self.order[start:stop] for (start, stop)
+                                  in zip(starts.tolist(), stops.tolist())])
+
+    def pairs(self, reach: float) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+        """ the pairs of different turtles in cells within reach of each other, each pair once """
+        (cells, starts, counts) = numpy.unique(self.sorted_keys, return_index=True,
+                                               return_counts=True)
+        (cell_columns, cell_rows) = (cells % self.columns, cells // self.columns)
+        cells_reach = math.ceil(reach / self.cell_size)
+        (firsts, seconds) = ([], [])
+        # each pair of cells once: the cell itself, then those below it or to its right
+        for row_offset in range(0, cells_reach + 1):
+            for column_offset in range(-cells_reach if row_offset > 0 else 0, cells_reach + 1):
+                column = cell_columns + column_offset
+                row = cell_rows + row_offset
+                other = row * self.columns + column
+                found = numpy.minimum(numpy.searchsorted(cells, other), len(cells) - 1)
+                valid = ((column >= 0) & (column < self.columns) & (row < self.rows) &
+                         (cells[found] == other))
+                (first, second) = _cell_pairs(starts[valid], counts[valid],
+                                              starts[found[valid]], counts[found[valid]])
+                if row_offset == 0 and column_offset == 0:
+                    keep = first < second
+                    (first, second) = (first[keep], second[keep])
+                firsts.append(self.order[first])
+                seconds.append(self.order[second])
+        return numpy.concatenate(firsts), numpy.concatenate(seconds)
+
+
+def _cell_pairs(first_starts: numpy.ndarray, first_counts: numpy.ndarray,
+                second_starts: numpy.ndarray, second_counts: numpy.ndarray
+                ) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    for runs of a sorted array given by their starts and counts, every
+    position in each first run paired with every position in its second run
+    """
+    sizes = first_counts * second_counts
+    ends = numpy.cumsum(sizes)
+    total = int(ends[-1]) if len(ends) > 0 else 0
+    # pair number within the pair of runs it belongs to
+    numbers = numpy.arange(total) - numpy.repeat(ends - sizes, sizes)
+    widths = numpy.repeat(second_counts, sizes)
+    return (numpy.repeat(first_starts, sizes) + numbers // widths,
+            numpy.repeat(second_starts, sizes) + numbers % widths)
+
+
+def _per_turtle(fun_name: str, param_name: str, values: typing.Any,
+                count: int) -> numpy.ndarray:
+    """ converts a number, or a sequence with one number per turtle, into an array """
+    array = numpy.asarray(values, dtype=float)
+    if array.ndim == 0:
+        return numpy.full(count, float(array))
+    if array.shape != (count,):
+        raise ValueError(f"In MediaComp.turtles.World.{fun_name}: {param_name} expected a " +
+                         f"number or one number per turtle, actually shape {array.shape} " +
+                         f"for {count} turtles")
+    return array
 
 
 class World(collections.abc.Iterable):
     """
     The world where the turtles live
+
+    The lines the turtles draw are kept in a buffer and only drawn on
+    :py:attr:`picture` when it is next used, all at once, which is much
+    faster than drawing each step as it is taken.
+
+    The positions, headings and pens of the turtles are kept in arrays with
+    one element per turtle, so :py:meth:`step` can move thousands of turtles
+    at once, and simulations can change them all at once by setting
+    :py:attr:`x_positions` and :py:attr:`y_positions`, or through the arrays of
+    :py:attr:`headings` and :py:attr:`pens_up`.
     """
 
     def __init__(self, width: int = 640, height: int = 480):
@@ -197,9 +479,176 @@ class World(collections.abc.Iterable):
         :param int width:
         :param int height:
         """
-        self.picture: pictures.Picture = pictures.Picture.make_empty(width,
-                                                                     height)
+        self.__picture: pictures.Picture = pictures.Picture.make_empty(width, height)
+        self.__segments: _Segments = _Segments()
+        self.__turtles: _TurtleArrays = _TurtleArrays()
         self.__turtle_list: typing.List[Turtle] = list()
+        self.__grid: _Grid = _Grid(self.__picture.width, self.__picture.height, 32)
+        self.__recordings: typing.List['Recording'] = list()
+
+    @property
+    def picture(self) -> pictures.Picture:
+        """
+        The ``Picture`` the turtles draw on. The lines the turtles have drawn
+        are drawn on it before its pixels are next read or changed, so it
+        always shows every line, even when it is kept in a variable.
+
+        Setting it draws the lines drawn so far on the old picture and makes
+        the turtles draw on the new one from then on.
+
+        :type: pictures.Picture
+        """
+        return self.__picture
+
+    @picture.setter
+    def picture(self, picture: pictures.Picture) -> None:
+        if not isinstance(picture, pictures.Picture):
+            raise TypeError(type_error_message("World.picture", "picture", "Picture", picture))
+        self.flush()
+        self.__picture = picture
+        self.__grid = _Grid(picture.width, picture.height, self.__grid.cell_size)
+        self.__turtles.moved = True
+
+    def flush(self) -> None:
+        """
+        Draws the lines the turtles have drawn that are not on
+        :py:attr:`picture` yet. This happens by itself whenever the picture is
+        used, so it is only needed to choose when the drawing is done.
+        """
+        _draw_segments(self.__picture, self.__segments.take())
+
+    def run_program(self, program: str,  # pylint: disable=too-many-arguments,too-many-locals
+                    turtle: typing.Optional[Turtle] = None, distance: float = 10.0,
+                    angle: float = 90.0, rules: typing.Optional[typing.Mapping[str, str]] = None,
+                    iterations: int = 0) -> Turtle:
+        """
+        Runs a turtle program given as a string of commands, one character each:
+
+        * ``F`` or ``G``: move forward ``distance``, drawing unless the pen is up
+        * ``f``: move forward ``distance`` without drawing
+        * ``+``: turn counterclockwise by ``angle`` degrees
+        * ``-``: turn clockwise by ``angle`` degrees
+        * ``|``: turn around
+        * ``[``: remember the position and heading
+        * ``]``: go back, without drawing, to the position and heading remembered
+          by the matching ``[``
+
+        Other characters do nothing, so they can be used as variables of an
+        L-system: if ``rules`` maps characters to strings, every character of the
+        program that has a rule is replaced by its string, ``iterations`` times,
+        before the program runs. For example, a Koch curve::
+
+            world.run_program("F", distance=2, angle=60, rules={"F": "F+F--F+F"}, iterations=6)
+
+        This draws the same lines, up to rounding, as calling
+        :py:meth:`Turtle.forward` and :py:meth:`Turtle.turn` for each command,
+        but computes all of the positions at once, so even programs with
+        millions of commands run quickly.
+
+        :param str program: the commands to run, or the start (axiom) of an L-system
+        :param Turtle turtle: the turtle to run it, a new one in the middle of
+            the world if ``None``
+        :param float distance: how far each forward command moves
+        :param float angle: how many degrees each turn command turns
+        :param rules: L-system rules, each one replacing a character with a string
+        :param int iterations: how many times to apply ``rules``
+        :return: the turtle, left where the program ends
+        :rtype: Turtle
+        :raises TypeError: if ``program`` or a rule is not a ``str``, or ``turtle`` is not
+            a ``Turtle``
+        :raises ValueError: if a rule does not rewrite a single ASCII character, the
+            brackets in the program do not match, or ``turtle`` lives in another world
+        """
+        if not isinstance(program, str):
+            raise TypeError(type_error_message("World.run_program", "program", "str", program))
+        if turtle is None:
+            turtle = self.new_turtle(self.__picture.width / 2, self.__picture.height / 2)
+        elif not isinstance(turtle, Turtle):
+            raise TypeError(type_error_message("World.run_program", "turtle", "Turtle", turtle))
+        elif not any(each is turtle for each in self.__turtle_list):
+            raise ValueError("In MediaComp.turtles.World.run_program: turtle lives in " +
+                             "another world")
+        distance = float(distance)
+        angle = float(angle)
+        codes = _expand(program, rules, int(iterations))
+        # the variables of an L-system do nothing, so leave them out
+        codes = codes[numpy.isin(codes, numpy.frombuffer(b"FGf+-|[]", dtype=numpy.uint8))]
+        (opens, closes, levels) = _match_brackets(codes)
+
+        # degrees[i] is the heading just before command i runs
+        turns = numpy.zeros(len(codes) + 1)
+        turns[0] = turtle.heading
+        turns[1:][codes == ord("+")] = angle
+        turns[1:][codes == ord("-")] = -angle
+        turns[1:][codes == ord("|")] = 180.0
+        _close_brackets(turns[1:], opens, closes, levels)
+        degrees = numpy.cumsum(turns) % 360.0
+
+        # positions[i] is the position just before command i runs
+        drawing = (codes == ord("F")) | (codes == ord("G"))
+        moving = numpy.flatnonzero(drawing | (codes == ord("f")))
+        headings = numpy.radians(degrees[moving])
+        moves = numpy.zeros((len(codes) + 1, 2))
+        moves[0] = (turtle.x, turtle.y)
+        moves[moving + 1, 0] = numpy.sin(headings) * distance
+        moves[moving + 1, 1] = numpy.cos(headings) * distance
+        _close_brackets(moves[1:], opens, closes, levels)
+        positions = numpy.cumsum(moves, axis=0)
+
+        if not turtle.pen_up:
+            drawn = numpy.flatnonzero(drawing)
+            segments = numpy.empty((len(drawn), 4))
+            segments[:, :2] = positions[drawn]
+            segments[:, 2:] = positions[drawn + 1]
+            self.__add_segments(segments)
+        turtle._place(positions[-1, 0], positions[-1, 1],  # pylint: disable=protected-access
+                      degrees[-1])
+        return turtle
+
+    def _add_segment(self, start_x: float, start_y: float, end_x: float, end_y: float) -> None:
+        """ records a line drawn by a turtle, see :py:meth:`Turtle.move_to` """
+        if len(self.__segments) == 0:
+            self.__picture._defer(self.flush)  # pylint: disable=protected-access
+        self.__segments.append(start_x, start_y, end_x, end_y)
+        for recording in self.__recordings:
+            recording._segments.append(start_x, start_y, end_x, end_y)
+
+    def __add_segments(self, segments: numpy.ndarray) -> None:
+        """ records the lines drawn by many turtles or steps at once """
+        if len(self.__segments) == 0:
+            self.__picture._defer(self.flush)  # pylint: disable=protected-access
+        self.__segments.extend(segments)
+        for recording in self.__recordings:
+            recording._segments.extend(segments)
+
+    def record(self) -> 'Recording':
+        """
+        Starts recording an animation of the lines the turtles draw. Call
+        :py:meth:`Recording.capture` on the result after each step to end a
+        frame::
+
+            recording = world.record()
+            for _ in range(100):
+                world.step(2.0, 5.0)
+                recording.capture()
+            recording.save("swirl.gif")
+
+        :return: the new recording
+        :rtype: Recording
+        """
+        recording = Recording(self, self.picture.copy())
+        self.__recordings.append(recording)
+        return recording
+
+    def _stop_recording(self, recording: 'Recording') -> None:
+        """ stops adding the lines the turtles draw to a recording, see Recording.stop """
+        if recording in self.__recordings:
+            self.__recordings.remove(recording)
+
+    def _repr_mimebundle_(self, include: typing.Any = None,
+                          exclude: typing.Any = None) -> typing.Dict[str, typing.Any]:
+        # pylint: disable=protected-access
+        return self.picture._repr_mimebundle_(include, exclude)
 
     def new_turtle(self, x_position: float = 0.0, y_position: float = 0.0,
                    heading: float = 0.0) -> Turtle:
@@ -212,12 +661,348 @@ class World(collections.abc.Iterable):
         :return:
         :rtype: Turtle
         """
-        turtle = Turtle(self, x_position, y_position, heading)
+        return Turtle(self, x_position, y_position, heading)
+
+    def _add_turtle(self, turtle: Turtle, x_position: float, y_position: float,
+                    heading: float) -> typing.Tuple[_TurtleArrays, int]:
+        """ gives a new turtle its elements of the arrays, see :py:meth:`Turtle.__init__` """
         self.__turtle_list.append(turtle)
-        return turtle
+        return self.__turtles, self.__turtles.add(x_position, y_position, heading)
+
+    @property
+    def x_positions(self) -> numpy.ndarray:
+        """
+        The x coordinates of the turtles, in the order they were made, as a
+        read-only array that follows the turtles as they move. It is only
+        valid until the next turtle is made.
+
+        Setting it to one number, or one number per turtle, moves the turtles
+        without drawing, for example ``world.x_positions = world.x_positions + 1``.
+        The array can not be changed in place, since the grid that
+        :py:meth:`turtles_near` and :py:meth:`close_pairs` search would not
+        know the turtles had moved.
+
+        :type: numpy.ndarray
+        :raises ValueError: if it is set to a sequence without one number per turtle
+        """
+        return self.__read_only(self.__turtles.x)
+
+    @x_positions.setter
+    def x_positions(self, values: typing.Any) -> None:
+        count = self.__turtles.count
+        self.__turtles.x[:count] = _per_turtle("x_positions", "x_positions", values, count)
+        self.__turtles.moved = True
+
+    @property
+    def y_positions(self) -> numpy.ndarray:
+        """
+        The y coordinates of the turtles, like :py:attr:`x_positions`
+
+        :type: numpy.ndarray
+        :raises ValueError: if it is set to a sequence without one number per turtle
+        """
+        return self.__read_only(self.__turtles.y)
+
+    @y_positions.setter
+    def y_positions(self, values: typing.Any) -> None:
+        count = self.__turtles.count
+        self.__turtles.y[:count] = _per_turtle("y_positions", "y_positions", values, count)
+        self.__turtles.moved = True
+
+    def __read_only(self, array: numpy.ndarray) -> numpy.ndarray:
+        view = array[:self.__turtles.count]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def headings(self) -> numpy.ndarray:
+        """
+        The headings of the turtles in degrees, in the order they were made.
+        Changing the array turns the turtles. It is only valid until the
+        next turtle is made.
+
+        :type: numpy.ndarray
+        """
+        return self.__turtles.heading[:self.__turtles.count]
+
+    @property
+    def pens_up(self) -> numpy.ndarray:
+        """
+        Which turtles have their pen up, like :py:attr:`headings`
+
+        :type: numpy.ndarray
+        """
+        return self.__turtles.pen_up[:self.__turtles.count]
+
+    def step(self, distance: typing.Any = 1.0, degrees: typing.Any = 0.0) -> None:
+        """
+        Turns every turtle and then moves it forward, like calling
+        :py:meth:`Turtle.turn` and :py:meth:`Turtle.forward` on each one, but
+        all at once. The lines drawn by the turtles with their pen down are
+        added to :py:attr:`picture` together.
+
+        :param distance: how far to move, one number for all of the turtles,
+            or a sequence with one number per turtle
+        :param degrees: how many degrees to turn counterclockwise first, one
+            number for all of the turtles, or a sequence with one number per turtle
+        :raises ValueError: if a sequence does not have one number per turtle
+        """
+        count = self.__turtles.count
+        distance = _per_turtle("step", "distance", distance, count)
+        degrees = _per_turtle("step", "degrees", degrees, count)
+        (x_positions, y_positions) = self.__positions()
+        headings = self.headings
+        numpy.remainder(headings + degrees, 360.0, out=headings)
+        radians = numpy.radians(headings)
+        new_x = x_positions + numpy.sin(radians) * distance
+        new_y = y_positions + numpy.cos(radians) * distance
+        drawing = ~self.pens_up
+        segments = numpy.empty((numpy.count_nonzero(drawing), 4))
+        segments[:, 0] = x_positions[drawing]
+        segments[:, 1] = y_positions[drawing]
+        segments[:, 2] = new_x[drawing]
+        segments[:, 3] = new_y[drawing]
+        self.__add_segments(segments)
+        x_positions[:] = new_x
+        y_positions[:] = new_y
+        self.__turtles.moved = True
+
+    @property
+    def grid_cell_size(self) -> float:
+        """
+        The size of the square cells the world is divided into to find
+        turtles by position, 32 to start with. The searches are quickest when
+        it is about the distances searched for, and there are a few turtles
+        per cell.
+
+        :type: float
+        """
+        return self.__grid.cell_size
+
+    @grid_cell_size.setter
+    def grid_cell_size(self, size: float) -> None:
+        size = float(size)
+        if not size > 0:
+            raise ValueError("In MediaComp.turtles.World.grid_cell_size: size must be " +
+                             f"positive, actually {size}")
+        self.__grid = _Grid(self.__picture.width, self.__picture.height, size)
+        self.__turtles.moved = True
+
+    def __positions(self) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+        """ x_positions and y_positions, but writable """
+        return (self.__turtles.x[:self.__turtles.count],
+                self.__turtles.y[:self.__turtles.count])
+
+    def __updated_grid(self) -> _Grid:
+        """ the grid, with the turtles that moved since the last search in their new cells """
+        self.__grid.update(self.__turtles)
+        return self.__grid
+
+    def __within(self, fun_name: str, x_position: float, y_position: float,
+                 radius: float) -> numpy.ndarray:
+        """ the indices of the turtles within radius of a position, in no particular order """
+        radius = float(radius)
+        if radius < 0:
+            raise ValueError(f"In MediaComp.turtles.World.{fun_name}: radius must not be " +
+                             f"negative, actually {radius}")
+        (x_position, y_position) = (float(x_position), float(y_position))
+        candidates = self.__updated_grid().near(x_position, y_position, radius)
+        (x_positions, y_positions) = self.__positions()
+        distances = numpy.hypot(x_positions[candidates] - x_position,
+                                y_positions[candidates] - y_position)
+        return candidates[distances <= radius]
+
+    def turtles_near(self, x_position: float, y_position: float,
+                     radius: float) -> typing.List[Turtle]:
+        """
+        Finds the turtles within a distance of a position, without looking
+        at the turtles far away from it.
+
+        :param float x_position:
+        :param float y_position:
+        :param float radius: how far from the position the turtles may be
+        :return: the turtles, in the order they were made
+        :rtype: list[Turtle]
+        :raises ValueError: if ``radius`` is negative
+        """
+        indices = numpy.sort(self.__within("turtles_near", x_position, y_position, radius))
+        return [self.__turtle_list[index] for index in indices.tolist()]
+
+    def nearest_turtles(self, x_position: float, y_position: float,
+                        count: int = 1) -> typing.List[Turtle]:
+        """
+        Finds the turtles nearest to a position, searching further
+        from it only until enough turtles are found.
+
+        :param float x_position:
+        :param float y_position:
+        :param int count: how many turtles to find
+        :return: the ``count`` nearest turtles (or all of them, if there are
+            fewer), nearest first
+        :rtype: list[Turtle]
+        """
+        count = min(int(count), self.__turtles.count)
+        if count <= 0:
+            return []
+        (x_position, y_position) = (float(x_position), float(y_position))
+        radius = self.__grid.cell_size
+        while True:
+            if count == self.__turtles.count:
+                candidates = numpy.arange(count)
+            else:
+                candidates = self.__within("nearest_turtles", x_position, y_position, radius)
+            # every turtle within radius has been found, so if there are enough
+            # of them, the nearest ones are among them
+            if len(candidates) >= count:
+                break
+            radius *= 2.0
+        (x_positions, y_positions) = self.__positions()
+        distances = numpy.hypot(x_positions[candidates] - x_position,
+                                y_positions[candidates] - y_position)
+        nearest = candidates[numpy.lexsort((candidates, distances))[:count]]
+        return [self.__turtle_list[index] for index in nearest.tolist()]
+
+    def close_pairs(self, radius: float) -> numpy.ndarray:
+        """
+        Finds every pair of turtles within a distance of each other, looking
+        only at turtles in nearby cells of the grid (see
+        :py:attr:`grid_cell_size`) rather than at every pair.
+
+        The pairs are given by the turtles' indices into :py:attr:`x_positions`
+        and the other arrays, so a simulation can use them with ``numpy``, for
+        example to count each turtle's neighbors::
+
+            pairs = world.close_pairs(10)
+            neighbors = numpy.bincount(pairs.ravel(), minlength=len(world.x_positions))
+
+        :param float radius: how far apart the turtles may be
+        :return: one row (i, j) with i < j for each pair, sorted
+        :rtype: numpy.ndarray
+        :raises ValueError: if ``radius`` is negative
+        """
+        radius = float(radius)
+        if radius < 0:
+            raise ValueError("In MediaComp.turtles.World.close_pairs: radius must not be " +
+                             f"negative, actually {radius}")
+        (firsts, seconds) = self.__updated_grid().pairs(radius)
+        (x_positions, y_positions) = self.__positions()
+        distances = numpy.hypot(x_positions[firsts] - x_positions[seconds],
+                                y_positions[firsts] - y_positions[seconds])
+        close = distances <= radius
+        pairs = numpy.column_stack((numpy.minimum(firsts[close], seconds[close]),
+                                    numpy.maximum(firsts[close], seconds[close])))
+        return pairs[numpy.lexsort((pairs[:, 1], pairs[:, 0]))]
 
     def __str__(self) -> str:
         return f"World: {len(self.__turtle_list)} turtles"
 
     def __iter__(self) -> typing.Iterator[Turtle]:
         return iter(self.__turtle_list)
+
+
+class Recording(collections.abc.Sequence):
+    """
+    The frames of an animation of the lines the turtles in a ``World`` draw,
+    made by :py:meth:`World.record`.
+
+    Rather than a copy of the picture for every frame, a recording keeps the
+    picture from when it started and the lines drawn in each frame, which
+    takes far less memory. The frames are only drawn when they are used, as
+    :py:class:`~.pictures.Picture` objects or saved as an animation.
+    Changes to the world's picture other than the turtles' lines are not recorded.
+    """
+
+    def __init__(self, world: World, start: pictures.Picture):
+        self.__world: World = world
+        self.__start: pictures.Picture = start
+        self._segments: _Segments = _Segments()
+        # how many segments had been drawn at the end of each frame
+        self.__ends: typing.List[int] = list()
+
+    def capture(self) -> None:
+        """
+        Ends a frame: the lines drawn since the last frame ended (or the
+        recording started) are drawn in this one
+        """
+        self.__ends.append(len(self._segments))
+
+    def stop(self) -> None:
+        """
+        Stops recording, any lines drawn after the last :py:meth:`capture` are left out
+        """
+        self.__world._stop_recording(self)  # pylint: disable=protected-access
+
+    def __str__(self) -> str:
+        return f"Recording: {len(self.__ends)} frames of " +\
+               f"{self.__start.width} x {self.__start.height}"
+
+    def __len__(self) -> int:
+        return len(self.__ends)
+
+    def __getitem__(self, index: typing.Any) -> pictures.Picture:
+        """
+        draws one frame
+
+        :param int index:
+        :return: the picture as it was at the end of frame ``index``
+        :rtype: pictures.Picture
+        :raises IndexError: if there is no frame ``index``
+        """
+        end = self.__ends[int(index)]
+        frame = self.__start.copy()
+        _draw_segments(frame, self._segments.rows(0, end))
+        return frame
+
+    def __iter__(self) -> typing.Iterator[pictures.Picture]:
+        """ draws the frames in order, each one on a copy of the one before it """
+        frame = self.__start.copy()
+        start = 0
+        for end in list(self.__ends):
+            _draw_segments(frame, self._segments.rows(start, end))
+            start = end
+            yield frame.copy()
+
+    def save(self, file_name: typing.Any, milliseconds_per_frame: int = 100,
+             loop: int = 0) -> None:
+        """
+        Saves the frames as an animation, in a format that can hold one, such
+        as GIF (``.gif``), animated PNG (``.png``) or WebP (``.webp``), chosen by
+        the extension of ``file_name``.
+
+        :param file_name: name of the file, or a file object (then saved as GIF)
+        :param int milliseconds_per_frame: how long each frame is shown
+        :param int loop: how many times to play the animation, 0 is forever
+        :raises ValueError: if no frames have been captured
+        """
+        if len(self.__ends) == 0:
+            raise ValueError("In MediaComp.turtles.Recording.save: no frames have been captured")
+        first = self[0]._pil_image.convert(mode="RGB")  # pylint: disable=protected-access
+        options = {"format": "GIF"} if not isinstance(file_name, (str, os.PathLike)) else {}
+        first.save(file_name, save_all=True, append_images=_RGBFrames(self),
+                   duration=int(milliseconds_per_frame), loop=int(loop), **options)
+
+    def _repr_mimebundle_(self, include: typing.Any = None,
+                          exclude: typing.Any = None) -> typing.Dict[str, typing.Any]:
+        """ how IPython shows a recording: as an animated GIF """
+        if len(self.__ends) == 0:
+            return {"text/plain": str(self)}
+        file_like = io.BytesIO()
+        self.save(file_like)
+        return {"image/gif": file_like.getvalue(), "text/plain": str(self)}
+
+
+class _RGBFrames:  # pylint: disable=too-few-public-methods
+    """
+    the frames of a recording after the first as RGB PIL images for saving
+    an animation, drawn again each time they are iterated over, since some
+    of PIL's writers go through them more than once
+    """
+
+    def __init__(self, recording: Recording):
+        self.__recording: Recording = recording
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        frames = iter(self.__recording)
+        next(frames)
+        for frame in frames:
+            yield frame._pil_image.convert(mode="RGB")  # pylint: disable=protected-access
@@ -0,0 +1,27 @@
+"""
+Colors convert their components to ints, except for the symbolic values
+Picture.map traces transforms with.
+"""
+import pytest
+
+from MediaComp.colors import Color
+
+
+class Symbolic:  # pylint: disable=too-few-public-methods
+    """ stands in for the values a traced transform works with """
+
+    def to_uint8(self):
+        return self
+
+
+@pytest.mark.parametrize("bad", [None, object(), [1]])
+def test_components_that_are_not_numbers_raise(bad):
+    with pytest.raises(TypeError):
+        Color(rgb=(bad, 0, 0)).rgb  # pylint: disable=expression-not-assigned
+
+
+def test_symbolic_components_are_kept():
+    symbol = Symbolic()
+    assert Color(rgb=(symbol, 1.7, 2)).rgb == (symbol, 1, 2)
+    with pytest.raises(TypeError):
+        Color(rgb=(symbol, None, 2)).rgb  # pylint: disable=expression-not-assigned
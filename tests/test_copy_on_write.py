@@ -0,0 +1,128 @@
+"""
+Copies of a picture share its pixels until one of them is changed, so every
+way of changing a picture must leave the pictures it shares pixels with alone.
+"""
+import numpy
+import pytest
+
+from MediaComp import files, pictures
+from MediaComp.colors import Colors
+
+
+def white_picture() -> pictures.Picture:
+    return pictures.Picture.make_empty(60, 40, Colors.white)
+
+
+def text_style() -> pictures.TextStyle:
+    if pictures.TextStyle.find_font_file("DejaVuSans") is None:
+        pytest.skip("no DejaVuSans font")
+    return pictures.TextStyle("DejaVuSans", "plain", 12)
+
+
+DRAWINGS = {
+    "add_arc": lambda picture: picture.add_arc(5, 5, 30, 20, 0, 180, Colors.red),
+    "add_arc_filled": lambda picture: picture.add_arc_filled(5, 5, 30, 20, 0, 180, Colors.red),
+    "add_line": lambda picture: picture.add_line(2, 3, 40, 20, Colors.red),
+    "add_oval": lambda picture: picture.add_oval(10, 10, 20, 15, Colors.red),
+    "add_oval_filled": lambda picture: picture.add_oval_filled(10, 10, 20, 15, Colors.red),
+    "add_rect": lambda picture: picture.add_rect(4, 4, 20, 10, Colors.red),
+    "add_rect_filled": lambda picture: picture.add_rect_filled(4, 4, 20, 10, Colors.red),
+    "add_text": lambda picture: picture.add_text(2, 2, "Hi", Colors.red),
+    "add_text_with_style":
+        lambda picture: picture.add_text_with_style(2, 2, "Hi", text_style(), Colors.red),
+    "set_color": lambda picture: picture.set_color(Colors.red),
+    "copy_into": lambda picture: pictures.Picture.make_empty(5, 5, Colors.red).copy_into(
+        picture, 3, 3),
+    "setitem": lambda picture: picture.__setitem__((1, 1), Colors.red),
+    "pixel": lambda picture: setattr(picture[1, 1], "red", 0),
+    "drawing": lambda picture: picture.drawing().__enter__().lines([(0, 0, 30, 30)], Colors.red),
+    "map inplace": lambda picture: picture.map(lambda pixel: Colors.red, inplace=True),
+}
+
+
+@pytest.mark.parametrize("name", sorted(DRAWINGS))
+def test_drawing_on_a_copy_leaves_the_original_alone(name):
+    original = white_picture()
+    copy = original.copy()
+    DRAWINGS[name](copy)
+    assert (original.as_array() == 255).all()
+    assert not (copy.as_array() == 255).all()
+
+
+@pytest.mark.parametrize("name", sorted(DRAWINGS))
+def test_drawing_on_the_original_leaves_a_copy_alone(name):
+    original = white_picture()
+    copy = original.copy()
+    DRAWINGS[name](original)
+    assert (copy.as_array() == 255).all()
+    assert not (original.as_array() == 255).all()
+
+
+@pytest.mark.parametrize("name", ["add_text", "add_line", "pixel"])
+def test_drawing_on_a_decoded_file_leaves_the_cache_alone(name, tmp_path):
+    white_picture().save(str(tmp_path / "white.png"))
+    files.cache_clear()
+    picture = pictures.Picture.from_file(str(tmp_path / "white.png"))
+    DRAWINGS[name](picture)
+    assert not (picture.as_array() == 255).all()
+    assert (pictures.Picture.from_file(str(tmp_path / "white.png")).as_array() == 255).all()
+
+
+def test_view_writes_show_up_in_the_parent_only():
+    parent = white_picture()
+    copy = parent.copy()
+    view = parent[10:20, 5:15]
+    view.add_rect_filled(0, 0, 100, 100, Colors.blue)
+    assert (parent.as_array()[5:15, 10:20] == Colors.blue.rgb).all()
+    assert (parent.as_array()[:5] == 255).all()
+    assert (copy.as_array() == 255).all()
+    numpy.testing.assert_array_equal(view.as_array(), parent.as_array()[5:15, 10:20])
+
+
+def test_pixel_writes_mark_the_changed_pixels():
+    picture = white_picture()
+    version = picture.version
+    picture[3, 4].red = 0
+    picture[10, 2].blue = 0
+    assert picture.version == version + 2
+    assert picture.dirty_box == (3, 2, 11, 5)
+    picture.clear_dirty()
+    copy = picture.copy()
+    copy[20, 30].green = 0
+    assert picture.dirty_box is None
+    assert copy.dirty_box == (20, 30, 21, 31)
+    assert picture[20, 30].green == 255
+    picture[0, 0].green = 0
+    assert copy[0, 0].green == 255
+    assert picture.dirty_box == (0, 0, 1, 1)
+
+
+def test_pixel_writes_on_a_view_mark_the_parent():
+    parent = white_picture()
+    view = parent[10:20, 5:15]
+    parent.clear_dirty()
+    view[2, 3].red = 0
+    assert parent[12, 8].red == 0
+    assert parent.dirty_box == (12, 8, 13, 9)
+
+
+def test_views_notice_writes_through_the_parent_and_other_views():
+    parent = white_picture()
+    view = parent[2:5, 2:5]
+    inner = view[1:3, 1:3]
+    other = parent[0:4, 0:4]
+    far = parent[30:40, 20:30]
+    parent[3, 3].red = 0
+    assert view.version > 0 and view.dirty_box == (1, 1, 2, 2)
+    assert inner.dirty_box == (0, 0, 1, 1)
+    assert other.dirty_box == (3, 3, 4, 4)
+    assert far.version == 0 and far.dirty_box is None
+    for picture in (parent, view, inner, other):
+        picture.clear_dirty()
+    version = other.version
+    other.add_rect_filled(0, 0, 2, 2, Colors.red)
+    assert other.version == version + 1
+    assert view.dirty_box == (0, 0, 1, 1)
+    assert inner.dirty_box is None
+    assert parent.dirty_box == (0, 0, 3, 3)
+    assert far.dirty_box is None
@@ -0,0 +1,52 @@
+"""
+Pictures kept in memory-mapped .npy files must read, change and save like
+pictures kept in RAM, including when they are saved back to their own file.
+"""
+import numpy
+
+from MediaComp import pictures
+from MediaComp.colors import Colors
+
+
+def test_open_memmap_makes_a_black_picture_in_the_file(tmp_path):
+    file_name = str(tmp_path / "new.npy")
+    picture = pictures.Picture.open_memmap(file_name, 50, 40)
+    assert (picture.width, picture.height) == (50, 40)
+    assert (picture.as_array() == 0).all()
+    picture.add_rect_filled(5, 5, 10, 10, Colors.red)
+    del picture
+    reopened = pictures.Picture.open_memmap(file_name)
+    assert (reopened.as_array()[5:15, 5:15] == Colors.red.rgb).all()
+
+
+def test_saving_a_mapped_picture_to_its_own_file(tmp_path):
+    file_name = str(tmp_path / "own.npy")
+    picture = pictures.Picture.open_memmap(file_name, 50, 40)
+    picture.add_rect_filled(5, 5, 10, 10, Colors.red)
+    picture.save(file_name)
+    assert (picture.as_array()[5:15, 5:15] == Colors.red.rgb).all()
+    saved = pictures.Picture.from_file(file_name)
+    numpy.testing.assert_array_equal(saved.as_array(), picture.as_array())
+
+
+def test_saving_a_loaded_npy_file_back(tmp_path):
+    file_name = str(tmp_path / "loaded.npy")
+    pictures.Picture.make_empty(30, 20, Colors.white).save(file_name)
+    picture = pictures.Picture.from_file(file_name)
+    picture[0, 0] = Colors.red
+    picture.save(file_name)
+    saved = pictures.Picture.from_file(file_name).as_array()
+    assert tuple(saved[0, 0]) == Colors.red.rgb
+    assert (saved[1:] == 255).all()
+    assert tuple(picture.as_array()[0, 0]) == Colors.red.rgb
+
+
+def test_saving_a_view_over_its_own_file(tmp_path):
+    file_name = str(tmp_path / "view.npy")
+    picture = pictures.Picture.open_memmap(file_name, 50, 40)
+    picture.add_rect_filled(10, 10, 5, 5, Colors.red)
+    picture[10:20, 10:20].save(file_name)
+    saved = pictures.Picture.from_file(file_name).as_array()
+    assert saved.shape == (10, 10, 3)
+    assert (saved[:5, :5] == Colors.red.rgb).all()
+    assert (saved[7:] == 0).all()
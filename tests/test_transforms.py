@@ -0,0 +1,216 @@
+"""
+The faster modes of Picture.map, map_if, combine and replace_if and of
+pipelines must give the same pictures as calling the functions once per pixel.
+"""
+import random
+
+import numpy
+import pytest
+
+from MediaComp import pictures
+from MediaComp.colors import Color, Colors
+
+
+def gradient_picture(width: int = 64, height: int = 48) -> pictures.Picture:
+    y, x = numpy.mgrid[0:height, 0:width]
+    array = numpy.stack([x * 255 // width, y * 255 // height, (x + y) % 256], axis=2)
+    return pictures.Picture.from_array(array.astype(numpy.uint8))
+
+
+def red_eye_picture(left: int = 200, top: int = 300) -> pictures.Picture:
+    """ a big gray picture with one small red patch: a color the rest never has """
+    array = numpy.full((600, 600, 3), 120, dtype=numpy.uint8)
+    array[top:top + 3, left:left + 3] = (200, 40, 40)
+    return pictures.Picture.from_array(array)
+
+
+def remove_red_eye(pixel):
+    if pixel.red > 150 and pixel.green < 80:
+        return Color(pixel.green, pixel.green, pixel.blue)
+    return pixel.color
+
+
+def assert_same_picture(first: pictures.Picture, second: pictures.Picture) -> None:
+    numpy.testing.assert_array_equal(first.as_array(), second.as_array())
+
+
+PATCHES = [(200, 300), (0, 0), (597, 597), (17, 431)]
+
+
+@pytest.mark.parametrize("left, top", PATCHES)
+def test_rare_colors_are_not_missed_by_auto_mode(left, top):
+    picture = red_eye_picture(left, top)
+    expected = picture.map(remove_red_eye, mode="pixel")
+    assert (expected.as_array()[top:top + 3, left:left + 3] == (40, 40, 40)).all()
+    assert_same_picture(picture.map(remove_red_eye, mode="auto"), expected)
+
+
+@pytest.mark.parametrize("left, top", PATCHES)
+def test_rare_colors_are_not_missed_by_pipelines(left, top):
+    picture = red_eye_picture(left, top)
+    expected = picture.map(remove_red_eye, mode="pixel")
+    assert_same_picture(picture.pipeline().map(remove_red_eye, mode="auto").picture, expected)
+
+
+def test_lut_mode_for_separable_transforms():
+    picture = gradient_picture()
+
+    def negate(pixel):
+        return Color(255 - pixel.red, 255 - pixel.green, 255 - pixel.blue)
+
+    assert_same_picture(picture.map(negate, mode="lut"), picture.map(negate, mode="pixel"))
+
+
+def darken(pixel):
+    return Color(pixel.red * 0.7, pixel.green * 0.7, pixel.blue * 0.7)
+
+
+def swap_bright(pixel):
+    if pixel.red + pixel.green > 200:
+        return Color(pixel.blue, pixel.red, pixel.green)
+    return pixel.color
+
+
+def stripes(pixel):
+    return Color(pixel.red, (pixel.x // 4 % 2) * 255, pixel.blue)
+
+
+def is_dark(pixel):
+    return pixel.red + pixel.green + pixel.blue < 300
+
+
+def is_corner(pixel):
+    return pixel.x < 10 and pixel.y < 10
+
+
+def blend(pixel, other):
+    return Color((pixel.red + other.red) / 2, pixel.green, other.blue)
+
+
+def brighter(pixel, other):
+    if pixel.red > other.red:
+        return pixel.color
+    return other.color
+
+
+@pytest.mark.parametrize("transform", [darken, swap_bright, stripes, remove_red_eye])
+def test_auto_map_matches_pixel_map(transform):
+    picture = gradient_picture()
+    assert_same_picture(picture.map(transform, mode="auto"), picture.map(transform, mode="pixel"))
+    assert_same_picture(picture.map(transform, mode="memo"), picture.map(transform, mode="pixel"))
+
+
+@pytest.mark.parametrize("predicate", [is_dark, is_corner])
+@pytest.mark.parametrize("transform", [darken, swap_bright])
+def test_auto_map_if_matches_pixel_map_if(predicate, transform):
+    picture = gradient_picture()
+    assert_same_picture(picture.map_if(predicate, transform, mode="auto"),
+                        picture.map_if(predicate, transform, mode="pixel"))
+
+
+@pytest.mark.parametrize("pixel_combine", [blend, brighter])
+def test_auto_combine_matches_pixel_combine(pixel_combine):
+    picture = gradient_picture()
+    other = picture.map(swap_bright)
+    assert_same_picture(picture.combine(pixel_combine, other, mode="auto"),
+                        picture.combine(pixel_combine, other, mode="pixel"))
+
+
+@pytest.mark.parametrize("predicate", [is_dark, is_corner])
+def test_auto_replace_if_matches_pixel_replace_if(predicate):
+    picture = gradient_picture()
+    other = picture.map(darken)
+    assert_same_picture(picture.replace_if(predicate, other, mode="auto"),
+                        picture.replace_if(predicate, other, mode="pixel"))
+
+
+@pytest.mark.parametrize("mode", ["auto", "pixel"])
+def test_pipelines_match_one_call_after_another(mode):
+    picture = gradient_picture()
+    other = picture.map(swap_bright)
+    expected = picture.map(darken).map_if(is_dark, swap_bright).combine(blend, other)
+    expected = expected.replace_if(is_corner, other)
+    pipeline = picture.pipeline().map(darken, mode=mode).map_if(is_dark, swap_bright, mode=mode)
+    pipeline = pipeline.combine(blend, other, mode=mode).replace_if(is_corner, other, mode=mode)
+    assert_same_picture(pipeline.picture, expected)
+
+
+def noise(pixel):
+    return Color(random.randrange(256), pixel.green, pixel.blue)
+
+
+def test_transforms_with_randomness_are_called_per_pixel_by_default():
+    picture = pictures.Picture.make_empty(40, 30, Colors.white)
+    for result in (picture.map(noise), picture.map_if(is_corner, noise),
+                   picture.pipeline().map(noise).picture):
+        assert len(numpy.unique(result.as_array()[:10, :10, 0])) > 50
+
+
+def test_transforms_reading_changing_state_are_called_per_pixel_by_default():
+    seen = []
+
+    def count(pixel):
+        seen.append(pixel)
+        return Color(len(seen) % 256, 0, 0)
+
+    picture = pictures.Picture.make_empty(20, 10, Colors.white)
+    result = picture.map(count)
+    assert len(seen) == 200
+    assert len(numpy.unique(result.as_array()[:, :, 0])) == 200
+
+
+def test_pipelines_call_per_pixel_transforms_in_order_on_threads():
+    seen = []
+
+    def count(pixel):
+        seen.append((pixel.x, pixel.y))
+        return Color(len(seen) % 256, 0, 0)
+
+    picture = pictures.Picture.make_empty(300, 400, Colors.white)
+    pictures.set_threads(4)
+    try:
+        result = picture.pipeline().map(count).map_channels(red=lambda red: red).picture
+    finally:
+        pictures.set_threads(1)
+    assert seen == [(x, y) for y in range(400) for x in range(300)]
+    numpy.testing.assert_array_equal(result.as_array()[:, :, 0],
+                                     (numpy.arange(1, 120001) % 256).reshape(400, 300))
+
+
+def count_calls(transform):
+    calls = []
+
+    def counted(pixel):
+        calls.append(pixel)
+        return transform(pixel)
+
+    return counted, calls
+
+
+def test_memo_mode_calls_the_transform_once_per_color():
+    # 65536 colors, each used twice: as many as memo mode takes
+    values = numpy.arange(1 << 17) % (1 << 16)
+    array = numpy.stack([values >> 8, values & 255, values & 15], axis=1)
+    picture = pictures.Picture.from_array(array.reshape(256, 512, 3).astype(numpy.uint8))
+    (transform, calls) = count_calls(darken)
+    result = picture.map(transform, mode="memo")
+    assert len(calls) == 1 << 16
+    assert_same_picture(result, picture.map(darken))
+
+
+def test_memo_mode_gives_up_on_noise_before_sorting_it(monkeypatch):
+    array = numpy.random.default_rng(0).integers(0, 256, (512, 512, 3), dtype=numpy.uint8)
+    region = array.copy()
+    sizes = []
+    unique = numpy.unique
+
+    def recorded_unique(values, *args, **kwargs):
+        sizes.append(numpy.size(values))
+        return unique(values, *args, **kwargs)
+
+    monkeypatch.setattr(numpy, "unique", recorded_unique)
+    (transform, calls) = count_calls(darken)
+    assert not pictures._map_distinct_colors(transform, region)  # pylint: disable=protected-access
+    assert max(sizes) < 512 * 512
+    assert not calls
+    numpy.testing.assert_array_equal(region, array)
@@ -0,0 +1,269 @@
+"""
+The array-based parts of turtles (neighbor queries, World.step and
+World.run_program) must agree with doing the same thing one turtle at a time.
+"""
+import numpy
+import pytest
+
+from MediaComp import pictures, turtles
+from MediaComp.colors import Colors
+
+
+def scattered_world(count: int = 300, seed: int = 0) -> turtles.World:
+    generator = numpy.random.default_rng(seed)
+    world = turtles.World(200, 160)
+    for _ in range(count):
+        world.new_turtle(generator.uniform(-20, 220), generator.uniform(-20, 180),
+                         generator.uniform(0, 360))
+    return world
+
+
+def brute_force_near(world, x_position, y_position, radius):
+    return [turtle for turtle in world
+            if numpy.hypot(turtle.x - x_position, turtle.y - y_position) <= radius]
+
+
+def brute_force_pairs(world, radius):
+    (x_positions, y_positions) = (world.x_positions, world.y_positions)
+    distances = numpy.hypot(x_positions[:, None] - x_positions[None, :],
+                            y_positions[:, None] - y_positions[None, :])
+    return numpy.column_stack(numpy.nonzero(numpy.triu(distances <= radius, 1)))
+
+
+def assert_queries_match_brute_force(world):
+    for (x_position, y_position, radius) in [(50, 50, 20), (0, 0, 60), (-10, 170, 40),
+                                             (100, 80, 0), (100, 80, 1000)]:
+        assert (world.turtles_near(x_position, y_position, radius) ==
+                brute_force_near(world, x_position, y_position, radius))
+    for radius in (0, 5, 20, 70):
+        numpy.testing.assert_array_equal(world.close_pairs(radius),
+                                         brute_force_pairs(world, radius))
+
+
+@pytest.mark.parametrize("cell_size", [7, 32, 50])
+def test_queries_match_brute_force(cell_size):
+    world = scattered_world()
+    world.grid_cell_size = cell_size
+    assert_queries_match_brute_force(world)
+    world.step(numpy.linspace(0, 30, 300), numpy.linspace(0, 360, 300))
+    list(world)[0].move_to(5000, -5000)
+    world.new_turtle(10, 10)
+    assert_queries_match_brute_force(world)
+
+
+def test_nearest_turtles_match_brute_force():
+    world = scattered_world()
+    for count in (0, 1, 7, 300, 305):
+        found = world.nearest_turtles(40, 60, count)
+        distances = sorted(numpy.hypot(turtle.x - 40, turtle.y - 60) for turtle in world)
+        assert [numpy.hypot(turtle.x - 40, turtle.y - 60) for turtle in found] == \
+            distances[:count]
+
+
+def test_queries_see_moves_made_by_setting_the_positions():
+    world = turtles.World(200, 200)
+    for index in range(10):
+        world.new_turtle(10 * index, 100)
+    x_positions = world.x_positions
+    assert len(world.turtles_near(50, 100, 1)) == 1
+    with pytest.raises(ValueError):
+        x_positions[:] = 150
+    world.x_positions = 150
+    assert len(world.turtles_near(150, 100, 1)) == 10
+    assert len(world.close_pairs(1)) == 45
+    assert (x_positions == 150).all()
+    world.y_positions = world.y_positions + numpy.arange(10) * 10
+    assert len(world.turtles_near(150, 100, 1)) == 1
+    with pytest.raises(ValueError):
+        world.y_positions = [1, 2]
+
+
+def test_queries_see_moves_of_single_turtles():
+    world = turtles.World(200, 200)
+    turtle_list = [world.new_turtle(10 * index, 100) for index in range(10)]
+    assert world.turtles_near(150, 100, 1) == []
+    turtle_list[3].move_to(150, 100)
+    assert world.turtles_near(150, 100, 1) == [turtle_list[3]]
+    world.run_program("F", turtle_list[4])
+    assert world.turtles_near(40, 110, 1) == [turtle_list[4]]
+    world.step(10.0)
+    assert world.turtles_near(150, 110, 1) == [turtle_list[3]]
+
+
+def white_world() -> turtles.World:
+    world = turtles.World(100, 80)
+    world.picture = pictures.Picture.make_empty(100, 80, Colors.white)
+    return world
+
+
+READS = {
+    "as_array": lambda picture: picture.as_array().copy(),
+    "pixel": lambda picture: numpy.array([[[picture[50, 40 + offset].red] * 3]
+                                          for offset in range(-20, 21)]),
+    "copy": lambda picture: picture.copy().as_array(),
+    "map": lambda picture: picture.map(lambda pixel: pixel.color).as_array(),
+}
+
+
+@pytest.mark.parametrize("name", sorted(READS))
+def test_a_kept_picture_shows_lines_drawn_later(name):
+    world = white_world()
+    picture = world.picture
+    turtle = world.new_turtle(50, 40)
+    turtle.forward(20)
+    assert (READS[name](picture) == 0).any()
+
+
+def test_a_kept_picture_saves_lines_drawn_later(tmp_path):
+    world = white_world()
+    picture = world.picture
+    world.new_turtle(50, 40).forward(20)
+    picture.save(str(tmp_path / "world.png"))
+    saved = pictures.Picture.from_file(str(tmp_path / "world.png"))
+    assert (saved.as_array() == 0).any()
+
+
+def test_drawing_on_the_picture_goes_over_earlier_lines():
+    world = white_world()
+    world.new_turtle(50, 40).forward(20)
+    world.picture.add_rect_filled(0, 0, 100, 80, Colors.red)
+    assert (world.picture.as_array() == Colors.red.rgb).all()
+
+
+def test_setting_the_picture_finishes_the_old_one():
+    world = white_world()
+    old = world.picture
+    turtle = world.new_turtle(50, 40)
+    turtle.forward(20)
+    world.picture = pictures.Picture.make_empty(100, 80, Colors.white)
+    turtle.turn(90)
+    turtle.forward(20)
+    assert (old.as_array()[40:61, 50] == 0).all()
+    assert (old.as_array()[60, 51:] == 255).all()
+    assert (world.picture.as_array()[60, 50:71] == 0).all()
+    assert (world.picture.as_array()[:60] == 255).all()
+    with pytest.raises(TypeError):
+        world.picture = "picture"
+
+
+def run_one_command_at_a_time(turtle, commands, distance, angle):
+    """ what World.run_program does, with the methods of Turtle """
+    stack = []
+    for command in commands:
+        if command in "FGf":
+            pen_up = turtle.pen_up
+            turtle.pen_up = pen_up or command == "f"
+            turtle.forward(distance)
+            turtle.pen_up = pen_up
+        elif command in "+-|":
+            turtle.turn({"+": angle, "-": -angle, "|": 180}[command])
+        elif command == "[":
+            stack.append((turtle.x, turtle.y, turtle.heading))
+        elif command == "]":
+            (x_position, y_position, heading) = stack.pop()
+            pen_up = turtle.pen_up
+            turtle.pen_up = True
+            turtle.move_to(x_position, y_position)
+            turtle.pen_up = pen_up
+            turtle.turn(heading - turtle.heading)
+
+
+def expand(program, rules, iterations):
+    for _ in range(iterations):
+        program = "".join(rules.get(command, command) for command in program)
+    return program
+
+
+PROGRAMS = {
+    "koch": ("F", {"F": "F+F--F+F"}, 4, 3, 60),
+    "dragon": ("FX", {"X": "X+YF+", "Y": "-FX-Y"}, 9, 4, 90),
+    "plant": ("X", {"X": "F+[[X]-X]-F[-FX]+X", "F": "FF"}, 4, 3, 25),
+}
+
+
+def run_both_ways(axiom, rules, iterations, distance, angle):
+    world = white_world()
+    turtle = world.new_turtle(50, 30, 10)
+    world.run_program(axiom, turtle, distance, angle, rules, iterations)
+    expected_world = white_world()
+    expected_turtle = expected_world.new_turtle(50, 30, 10)
+    run_one_command_at_a_time(expected_turtle, expand(axiom, rules, iterations),
+                              distance, angle)
+    assert turtle.x == pytest.approx(expected_turtle.x)
+    assert turtle.y == pytest.approx(expected_turtle.y)
+    assert turtle.heading == pytest.approx(expected_turtle.heading % 360)
+    return world.picture.as_array(), expected_world.picture.as_array()
+
+
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_run_program_draws_like_one_command_at_a_time(name):
+    numpy.testing.assert_array_equal(*run_both_ways(*PROGRAMS[name]))
+
+
+def test_run_program_draws_every_command_up_to_rounding():
+    # going back to a '[' adds up the moves since then, so an end that lands
+    # right on a pixel boundary can round the other way
+    (picture, expected) = run_both_ways("F[+F]f|F[-F[+FF]]F", {}, 0, 20, 30)
+    assert (picture != expected).any(axis=2).sum() <= 4
+    assert (picture == 0).any()
+
+
+@pytest.mark.parametrize("program", ["[F", "F]", "]["])
+def test_run_program_needs_matching_brackets(program):
+    with pytest.raises(ValueError):
+        white_world().run_program(program)
+
+
+def test_step_draws_like_turning_and_moving_each_turtle():
+    generator = numpy.random.default_rng(1)
+    (world, expected_world) = (white_world(), white_world())
+    for _ in range(60):
+        (x_position, y_position, heading) = (generator.uniform(0, 100), generator.uniform(0, 80),
+                                             generator.uniform(0, 360))
+        world.new_turtle(x_position, y_position, heading)
+        expected_world.new_turtle(x_position, y_position, heading)
+    for (turtle, expected_turtle) in list(zip(world, expected_world))[::3]:
+        turtle.pen_up = True
+        expected_turtle.pen_up = True
+    for _ in range(10):
+        (distances, angles) = (generator.uniform(-5, 5, 60), generator.uniform(-30, 30, 60))
+        world.step(distances, angles)
+        for (turtle, distance, degrees) in zip(expected_world, distances, angles):
+            turtle.turn(degrees)
+            turtle.forward(distance)
+    assert (world.picture.as_array() == 0).any()
+    numpy.testing.assert_array_equal(world.picture.as_array(), expected_world.picture.as_array())
+    numpy.testing.assert_allclose(world.x_positions, expected_world.x_positions)
+    numpy.testing.assert_allclose(world.headings, expected_world.headings % 360)
+
+
+def test_turtles_are_views_of_the_arrays():
+    world = white_world()
+    turtle = world.new_turtle(10, 20, 30)
+    world.x_positions = [40]
+    world.headings[0] = 90
+    assert (turtle.x, turtle.y, turtle.heading) == (40, 20, 90)
+    turtle.pen_up = True
+    assert world.pens_up[0]
+    with pytest.raises(ValueError):
+        world.step([1, 2])
+
+
+def test_worlds_sharing_a_picture_both_draw_on_it():
+    (first, second) = (white_world(), white_world())
+    second.picture = first.picture
+    first.new_turtle(20, 10).forward(30)
+    second.new_turtle(60, 10).forward(30)
+    array = first.picture.as_array()
+    assert (array[10:41, 20] == 0).all()
+    assert (array[10:41, 60] == 0).all()
+    first.new_turtle(40, 10).forward(30)
+    assert (second.picture.as_array()[10:41, 40] == 0).all()
+
+
+def test_run_program_needs_a_turtle_of_the_same_world():
+    (world, other_world) = (white_world(), white_world())
+    turtle = other_world.new_turtle(50, 30)
+    with pytest.raises(ValueError):
+        world.run_program("F", turtle)
+    assert (turtle.x, turtle.y) == (50, 30)